@@ -1,224 +1,468 @@
 import openai
-import re
+import ast
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import math
+import operator
 import os
+import time
+from collections import OrderedDict
 from dotenv import load_dotenv
-from tools.web_search import web_search
+from core.rate_limiter import RateLimiter
+from tools.web_search import aweb_search
 from tools.text_analyzer import text_analyzer
 from tools.verify_result import verify_result
 
 # Load environment variables from .env file
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
+MAX_ITERATIONS_MESSAGE = "Max iterations reached without final answer"
+
+# Seconds each step of the answer cache lookup (embedding, Milvus search) may take
+_CACHE_LOOKUP_TIMEOUT = 1.0
+
+# Usage policy lives in the tool descriptions, so the system prompt stays tiny
+_SYSTEM_PROMPT = (
+    "You are a helpful assistant. Answer directly when you can; otherwise call tools, "
+    "following each tool's usage notes, then give a concise final answer."
+)
+
 class ReActAgent:
-    def __init__(self, api_key: str):
-        """Initialize the ReAct agent with OpenAI client."""
-        self.client = openai.OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, answer_cache=None, plan_cache=None):
+        """Initialize the ReAct agent with OpenAI client and optional answer and plan caches."""
+        self.client = openai.AsyncOpenAI(api_key=api_key)
+        
+        # Start every question on the cheap model and escalate only when it misbehaves
+        self.fast_model = "gpt-4o-mini"
+        self.smart_model = "gpt-4"
+        
+        # Optionally run the chat loop on a local Ollama server (OpenAI-compatible API)
+        self.local = os.getenv("OLLAMA_BASE_URL")
+        if self.local:
+            self.chat_client = openai.AsyncOpenAI(base_url=f"{self.local.rstrip('/')}/v1", api_key="ollama")
+            self.fast_model = self.smart_model = os.getenv("OLLAMA_MODEL", "qwen2.5-coder")
+        else:
+            self.chat_client = self.client
+        
+        # Optionally pace chat requests to the account's requests-per-minute limit, so
+        # bursts of concurrent chats wait their turn instead of failing with 429s
+        rpm = os.getenv("OPENAI_RPM")
+        self.rate_limiter = RateLimiter(int(rpm)) if rpm else None
         self.tools = {}  # We'll add tools here
         self.max_iterations = 10  # Prevent infinite loops
+        self.answer_cache = answer_cache
+        self.plan_cache = plan_cache  # Optional core.plan_cache.PlanCache
+        self.tool_cache = OrderedDict()  # (tool_name, tool_input) -> (observation, expiry)
+        self.tool_cache_size = 1024  # Maximum number of cached tool results
+        self._tool_schema_cache = None  # Function-calling schemas, rebuilt when tools change
+        self._prompt_cache_key = None  # Hash of the static request prefix (system prompt + tools)
+        self._loop = None  # Event loop reused by the synchronous run() wrapper
         
         # Automatically register all available tools
         self._register_default_tools()
     
-    def add_tool(self, name: str, func, description: str):
-        """Add a tool that the agent can use."""
+    def add_tool(self, name: str, func, description: str, ttl: float = 0, timeout: float = 15):
+        """
+        Add a tool that the agent can use. Results are cached for `ttl` seconds (0 disables
+        caching) and a call taking longer than `timeout` seconds is abandoned.
+        """
         self.tools[name] = {
             'function': func,
-            'description': description
+            'description': description,
+            'ttl': ttl,
+            'timeout': timeout,
+            'is_async': asyncio.iscoroutinefunction(func)
         }
+        self._tool_schema_cache = None
 
     def _register_default_tools(self):
         """Automatically register all available tools."""
-        # Register calculator
-        self.add_tool("calculator", calculator, "Evaluates mathematical expressions")
+        # Register calculator (deterministic, cache forever)
+        self.add_tool("calculator", calculator, "Evaluates a mathematical expression, e.g. '25 * 17 + 48'", ttl=math.inf)
         
-        # Register web search
-        self.add_tool("web_search", web_search, "Searches the web for current information")
+        # Register web search (results go stale, cache briefly)
+        self.add_tool("web_search", aweb_search, "Searches the web for current information", ttl=600)
         
-        # Register text analyzer
-        self.add_tool("text_analyzer", text_analyzer, "Analyzes text statistics and insights")
+        # Register text analyzer (deterministic, cache forever)
+        self.add_tool("text_analyzer", text_analyzer, "Analyzes text statistics and insights", ttl=math.inf)
         
         # Register verification tool
-        self.add_tool("verify_result", verify_result, "Verifies if results are reasonable and accurate")
+        self.add_tool(
+            "verify_result",
+            verify_result,
+            "Cross-checks a stated result against several web sources. Verify numbers, technical specs, "
+            "dates and scientific data once; medical, legal, financial and safety information twice. "
+            "Skip for greetings, general knowledge and calculator results.",
+            ttl=3600,
+            timeout=60  # Runs several searches
+        )
 
 
     
-    def run(self, question: str) -> str:
-        """Main method to run the ReAct loop."""
-        # Create system prompt explaining ReAct format
-        system_prompt = """You are a helpful assistant that uses tools to answer questions.
-
-You must follow this exact format:
-Thought: [your reasoning about what to do next]
-Action: [tool_name: tool_input] OR skip if no tool needed
-Observation: [tool result will be inserted here by the system]
-... (repeat Thought/Action/Observation as needed)
-Thought: [final reasoning]
-Final Answer: [your final answer to the question]
-
-IMPORTANT RULES:
-- For simple greetings, basic questions, or things you can answer directly: skip tools and go straight to Final Answer
-- Only use tools when you need to: calculate, search for current info, analyze text, or verify results
-- You generate the "Thought:" and "Action:" lines
-- The system will automatically add the "Observation:" line with the tool result
-- DO NOT write "Observation:" yourself - wait for the system to add it
-- After each Action, STOP and wait for the Observation
-- Only proceed with the next Thought after receiving an Observation
-
-VERIFICATION GUIDELINES:
-SINGLE VERIFICATION (verify once, then proceed):
-- Numbers, measurements, statistics, percentages, quantities
-- Technical specifications (engine power, performance data, dimensions)
-- Historical dates, events, timelines
-- Scientific data, research findings, formulas
-
-DOUBLE VERIFICATION (verify twice for critical accuracy):
-- Medical information, drug dosages, health claims
-- Legal information, regulations, laws, court cases
-- Financial data, investment advice, tax information
-- Safety information, warnings, hazards, emergency procedures
-
-NO VERIFICATION needed for:
-- Simple greetings, basic conversations
-- Well-known general knowledge
-- Simple calculations with calculator tool
+    def _tool_schemas(self) -> list:
+        """Return the OpenAI function-calling schema for every registered tool."""
+        if self._tool_schema_cache is None:
+            self._tool_schema_cache = self._build_tool_schemas()
+            # Requests sharing this prefix hit the provider's prompt cache
+            prefix = json.dumps([_SYSTEM_PROMPT, self._tool_schema_cache], sort_keys=True)
+            self._prompt_cache_key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:32]
+        return self._tool_schema_cache
 
-IMPORTANT: After completing the required verifications, accept the results and provide your final answer. Do not continue verifying beyond the specified level.
-
-Available tools (use only when needed):
-- calculator: [mathematical expression] - evaluates math expressions
-- web_search: [query] - searches the web for current information
-- text_analyzer: [text] - analyzes text statistics and provides insights
-- verify_result: [description of result to verify] - REQUIRED for numbers, technical specs, legal/medical info, and other critical data
-
-Examples:
-
-Simple greeting:
-Question: Hello
-Thought: This is a simple greeting that doesn't require any tools.
-Final Answer: Hello! I'm here to help you with questions, calculations, web searches, and text analysis. What can I assist you with?
+    def _build_tool_schemas(self) -> list:
+        """Build the OpenAI function-calling schema for every registered tool."""
+        return [
+            {
+                "type": "function",
+                "function": {
+                    "name": name,
+                    "description": tool['description'],
+                    "parameters": {
+                        "type": "object",
+                        "properties": {"input": {"type": "string"}},
+                        "required": ["input"]
+                    }
+                }
+            }
+            for name, tool in self.tools.items()
+        ]
 
-Technical question (single verification):
-Question: What is the power of a GE90 engine?
-Thought: This asks for technical specifications, which requires single verification.
-Action: web_search: GE90 engine horsepower power
+    def _parse_tool_input(self, tool_call):
+        """Return the tool input for a well-formed tool call, or None if it cannot be executed."""
+        if tool_call["function"]["name"] not in self.tools:
+            return None
+        try:
+            arguments = json.loads(tool_call["function"]["arguments"] or "{}")
+        except json.JSONDecodeError:
+            return None
+        return arguments.get("input", "") if isinstance(arguments, dict) else None
 
-[System adds: Observation: GE90 engines produce around 95,000 HP at takeoff]
+    async def _execute_tool(self, tool_call) -> tuple:
+        """Execute a single tool call requested by the model and return the observation and whether it succeeded."""
+        tool_name = tool_call["function"]["name"]
+        
+        if tool_name not in self.tools:
+            return f"Error - Unknown tool '{tool_name}'", False
+        
+        tool_input = self._parse_tool_input(tool_call)
+        if tool_input is None:
+            return f"Error - Invalid arguments for tool '{tool_name}'", False
+        
+        tool = self.tools[tool_name]
+        cache_key = (tool_name, tool_input)
+        
+        # Serve repeated tool calls from the cache while they are fresh
+        cached = self.tool_cache.get(cache_key)
+        if cached is not None and cached[1] > time.monotonic():
+            self.tool_cache.move_to_end(cache_key)
+            log.debug("Cached %s: %s", tool_name, tool_input)
+            return cached[0], True
+        
+        log.debug("Executing %s: %s", tool_name, tool_input)
+        # Async tools run on the loop; blocking ones run in a worker thread
+        if tool['is_async']:
+            call = tool['function'](tool_input)
+        else:
+            call = asyncio.to_thread(tool['function'], tool_input)
+        try:
+            observation = await asyncio.wait_for(call, timeout=tool['timeout'])
+        except asyncio.TimeoutError:
+            log.warning("%s timed out after %ss", tool_name, tool['timeout'])
+            return f"Error - Tool '{tool_name}' timed out", False
+        log.debug("Observation: %s", observation)
+        
+        if tool['ttl'] > 0 and observation is not None:
+            self.tool_cache[cache_key] = (str(observation), time.monotonic() + tool['ttl'])
+            self.tool_cache.move_to_end(cache_key)
+            if len(self.tool_cache) > self.tool_cache_size:
+                self.tool_cache.popitem(last=False)
+        # Tools report a failure they handled themselves (e.g. no API key) by returning None
+        return str(observation), observation is not None
+    
+    def run(self, question: str, on_token=None, max_iterations: int = None) -> str:
+        """Synchronous wrapper around arun() for scripts and the CLI."""
+        # Reuse one loop so the async HTTP client's connection pool stays valid between calls
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(self.arun(question, on_token=on_token, max_iterations=max_iterations))
 
-Thought: I found a power figure. Since this is technical data, I need one verification then proceed.
-Action: verify_result: GE90 engine produces 55,000 horsepower
+    async def run_batch_async(self, questions: list, max_concurrency: int = 8) -> list:
+        """Answer several independent questions concurrently, returning answers in input order."""
+        # Bound in-flight ReAct loops to stay within provider rate limits
+        semaphore = asyncio.Semaphore(max_concurrency)
 
-[System adds: Observation: Verification shows values ranging from 55,000-62,000 HP depending on variant]
+        async def run_one(question: str) -> str:
+            async with semaphore:
+                return await self.arun(question)
 
-Thought: One verification complete. The range is 55,000-62,000 HP depending on variant.
-Final Answer: GE90 engines produce approximately 55,000-62,000 horsepower depending on the specific variant.
+        return await asyncio.gather(*[run_one(question) for question in questions])
 
-Medical question (double verification):
-Question: What is the safe dosage of ibuprofen?
-Thought: This is medical information requiring double verification for safety.
-Action: web_search: safe ibuprofen dosage adults
+    def run_batch(self, questions: list, max_concurrency: int = 8) -> list:
+        """Synchronous wrapper around run_batch_async()."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(self.run_batch_async(questions, max_concurrency))
 
-[System adds: Observation: 200-400mg every 4-6 hours, max 1200mg daily]
+    async def _embed(self, text: str) -> list:
+        """Embed text for the semantic answer cache."""
+        response = await self.client.embeddings.create(input=text, model="text-embedding-3-small")
+        return response.data[0].embedding
 
-Thought: Found dosage info. Since this is medical, I need first verification.
-Action: verify_result: ibuprofen safe dosage 200-400mg every 4-6 hours
+    async def arun(self, question: str, on_token=None, max_iterations: int = None) -> str:
+        """
+        Answer a question, serving semantically identical questions from the answer cache.
 
-[System adds: Observation: Multiple sources confirm 200-400mg range, some say max 3200mg daily]
+        If given, on_token is called with each chunk of assistant text as it streams in, and
+        max_iterations overrides the agent's default for this question only.
+        """
+        if self.answer_cache is None:
+            answer, _ = await self._react_loop(question, on_token, max_iterations)
+            return answer
+        
+        # Look the question up before starting the ReAct loop, so a cache hit never pays for
+        # an LLM turn or tool calls; a slow lookup counts as a miss rather than stalling the answer
+        embedding = None
+        try:
+            embedding = await asyncio.wait_for(self._embed(question), timeout=_CACHE_LOOKUP_TIMEOUT)
+            cached_answer = await asyncio.wait_for(self.answer_cache.alookup(embedding), timeout=_CACHE_LOOKUP_TIMEOUT)
+            if cached_answer is not None:
+                if on_token:
+                    on_token(cached_answer)
+                return cached_answer
+        except asyncio.TimeoutError:
+            log.warning("Answer cache lookup timed out after %ss", _CACHE_LOOKUP_TIMEOUT)
+        except Exception as e:
+            log.warning("Answer cache lookup failed: %s", e)
+        
+        answer, failed = await self._react_loop(question, on_token, max_iterations)
+        
+        # Answers cut short by a per-request iteration limit, and answers built on a failed
+        # tool call, aren't representative of the question, so they are not served to similar questions
+        overridden = max_iterations not in (None, self.max_iterations)
+        if embedding is not None and answer and answer != MAX_ITERATIONS_MESSAGE and not overridden and not failed:
+            try:
+                await self.answer_cache.astore(question, embedding, answer)
+            except Exception as e:
+                log.warning("Failed to cache answer: %s", e)
+        return answer
 
-Thought: First verification done. Need second verification for medical safety.
-Action: verify_result: ibuprofen maximum daily dose 1200mg vs 3200mg
+    async def _stream_turn(self, model: str, messages: list, request_options: dict, on_token=None) -> tuple:
+        """
+        Stream one assistant turn, starting each tool call as soon as its arguments are complete.
 
-[System adds: Observation: OTC limit is 1200mg daily, prescription can go to 3200mg daily]
+        Returns the message content, the assembled tool calls, the finish reason, the usage
+        report and the tasks already executing the leading tool calls (in tool call order).
+        """
+        if self.rate_limiter:
+            await self.rate_limiter.acquire()
+        stream = await self.chat_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            **request_options
+        )
+        
+        content_parts = []
+        tool_calls = []
+        tasks = []
+        finish_reason = None
+        usage = None
+        
+        async for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            
+            choice = chunk.choices[0]
+            if choice.delta.content:
+                content_parts.append(choice.delta.content)
+                if on_token:
+                    on_token(choice.delta.content)
+            
+            for delta in choice.delta.tool_calls or []:
+                if delta.index >= len(tool_calls):
+                    # A new tool call begins, so the previous ones are complete - start them
+                    # while the model is still generating the rest of the turn
+                    tasks += [asyncio.create_task(self._execute_tool(tool_call)) for tool_call in tool_calls[len(tasks):]]
+                    tool_calls.append({"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+                
+                tool_call = tool_calls[delta.index]
+                if delta.id:
+                    tool_call["id"] = delta.id
+                if delta.function and delta.function.name:
+                    tool_call["function"]["name"] += delta.function.name
+                if delta.function and delta.function.arguments:
+                    tool_call["function"]["arguments"] += delta.function.arguments
+            
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+        
+        return "".join(content_parts), tool_calls, finish_reason, usage, tasks
 
-Thought: Double verification complete. Clear distinction between OTC and prescription limits.
-Final Answer: For over-the-counter use, ibuprofen dosage is 200-400mg every 4-6 hours with a maximum of 1200mg per day. Higher doses require medical supervision.
+    async def _react_loop(self, question: str, on_token=None, max_iterations: int = None) -> tuple:
+        """
+        Main method to run the ReAct loop using native tool calling.
 
-Knowledge question:
-Question: What is AI?
-Thought: I can answer this directly without needing tools.
-Final Answer: AI (Artificial Intelligence) refers to computer systems that can perform tasks typically requiring human intelligence, such as learning, reasoning, and problem-solving.
-"""
-        
-        # Initialize conversation
+        Returns the answer and whether any tool call failed along the way; a failed model
+        call raises instead.
+        """
+        # Initialize conversation - the system message is never rewritten and later turns are
+        # only appended, so every iteration shares the same cacheable prefix
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": _SYSTEM_PROMPT},
             {"role": "user", "content": question}
         ]
+        request_options = {"tools": self._tool_schemas(), "tool_choice": "auto", "temperature": 0}
+        if not self.local:
+            request_options["extra_body"] = {"prompt_cache_key": self._prompt_cache_key}
+            request_options["stream_options"] = {"include_usage": True}
+        
+        model = self.fast_model
+        failed = False
+        
+        # Replay the tool calls cached for this question shape, so the first turn can go
+        # straight to synthesizing the answer instead of planning the calls again
+        plan = self.plan_cache.lookup(question, self._prompt_cache_key) if self.plan_cache else None
+        if plan:
+            log.debug("Replaying cached plan: %s", plan)
+            tool_calls = [
+                {
+                    "id": f"plan_{n}",
+                    "type": "function",
+                    "function": {"name": tool_name, "arguments": json.dumps({"input": tool_input})}
+                }
+                for n, (tool_name, tool_input) in enumerate(plan)
+            ]
+            messages.append({"role": "assistant", "content": None, "tool_calls": tool_calls})
+            results = await asyncio.gather(*[self._execute_tool(tool_call) for tool_call in tool_calls])
+            failed = not all(ok for _, ok in results)
+            for tool_call, (observation, _) in zip(tool_calls, results):
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call["id"],
+                    "content": observation
+                })
+        steps = list(plan or [])  # (tool_name, tool_input) executed so far, for the plan cache
         
-        # Main ReAct loop
-        for i in range(self.max_iterations):
-            # Get response from OpenAI
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=messages,
-                temperature=0
-            )
+        # Main ReAct loop - each completion carries both the reasoning and the tool calls
+        for i in range(max_iterations or self.max_iterations):
+            # Stream the response from OpenAI, dispatching tool calls as they complete
+            content, tool_calls, finish_reason, usage, tasks = await self._stream_turn(model, messages, request_options, on_token)
             
-            assistant_message = response.choices[0].message.content
-            messages.append({"role": "assistant", "content": assistant_message})
+            log.debug("--- Iteration %d ---", i + 1)
+            details = getattr(usage, "prompt_tokens_details", None)
+            if details and details.cached_tokens:
+                log.debug("Prompt cache hit: %d/%d tokens", details.cached_tokens, usage.prompt_tokens)
+            if content:
+                log.debug("%s", content)
             
-            print(f"\n--- Iteration {i+1} ---")
-            print(assistant_message)
+            # No tool calls means the model has produced its final answer
+            if finish_reason == "stop" or not tool_calls:
+                for task in tasks:
+                    task.cancel()
+                # A plan with a malformed call (None input) would fail again on replay
+                if self.plan_cache and steps and all(tool_input is not None for _, tool_input in steps):
+                    self.plan_cache.store(question, self._prompt_cache_key, steps)
+                return content.strip(), failed
             
-
+            # Malformed tool calls from the fast model: retry this turn on the smart model
+            if model != self.smart_model and any(
+                self._parse_tool_input(tool_call) is None for tool_call in tool_calls
+            ):
+                log.warning("Malformed tool call from %s, escalating to %s", model, self.smart_model)
+                for task in tasks:
+                    task.cancel()
+                model = self.smart_model
+                continue
             
-            # Check if we have a final answer
-            if "Final Answer:" in assistant_message:
-                # Extract and return the final answer
-                final_answer = assistant_message.split("Final Answer:")[-1].strip()
-                return final_answer
+            messages.append({
+                "role": "assistant",
+                "content": content or None,
+                "tool_calls": tool_calls
+            })
             
-            # Look for an action to execute
-            action_match = re.search(r"Action:\s*(\w+):\s*(.+)", assistant_message)
-            if action_match:
-                tool_name = action_match.group(1)
-                tool_input = action_match.group(2).strip()
-                
-                # Execute the tool
-                if tool_name in self.tools:
-                    observation = self.tools[tool_name]['function'](tool_input)
-                    observation_text = f"Observation: {observation}"
-                    
-                    print(f"Executing {tool_name}: {tool_input}")
-                    print(observation_text)
-                    
-                    # Add observation to conversation
-                    messages.append({"role": "user", "content": observation_text})
-                else:
-                    error_msg = f"Observation: Error - Unknown tool '{tool_name}'"
-                    print(error_msg)
-                    messages.append({"role": "user", "content": error_msg})
-            else:
-                # No action found - check if model is trying to continue without tools
-                if "Thought:" in assistant_message and "Final Answer:" not in assistant_message:
-                    print("🤔 Model is thinking but no action specified. Continuing...")
-                    # Let the loop continue to get the next response
-                else:
-                    print("⚠️ Unexpected response format. Continuing...")
-                    # Let the loop continue
+            # Start the tool calls that completed with the stream and wait for all observations
+            tasks += [asyncio.create_task(self._execute_tool(tool_call)) for tool_call in tool_calls[len(tasks):]]
+            results = await asyncio.gather(*tasks)
+            failed = failed or not all(ok for _, ok in results)
+            steps += [(tool_call["function"]["name"], self._parse_tool_input(tool_call)) for tool_call in tool_calls]
+            for tool_call, (observation, _) in zip(tool_calls, results):
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call["id"],
+                    "content": observation
+                })
         
-        return "Max iterations reached without final answer"
+        return MAX_ITERATIONS_MESSAGE, failed
+
+# Operators and functions the calculator accepts; anything else is rejected
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+_FUNCTIONS = {
+    'abs': abs,
+    'round': round,
+    'min': min,
+    'max': max,
+    'pow': pow,
+}
+_CONSTANTS = {
+    'pi': math.pi,
+    'e': math.e,
+}
+
+def _eval_node(node):
+    """Recursively evaluate a whitelisted arithmetic AST node."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.Name) and node.id in _CONSTANTS:
+        return _CONSTANTS[node.id]
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        return _BIN_OPS[type(node.op)](_eval_node(node.left), _eval_node(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_eval_node(node.operand))
+    if isinstance(node, (ast.Tuple, ast.List)):
+        return [_eval_node(element) for element in node.elts]
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in _FUNCTIONS and not node.keywords):
+        return _FUNCTIONS[node.func.id](*[_eval_node(arg) for arg in node.args])
+    raise ValueError(f"unsupported expression element '{type(node).__name__}'")
+
+@functools.lru_cache(maxsize=1024)
+def _parse_expression(expression: str):
+    """Parse an expression once; repeated expressions reuse the cached (read-only) tree."""
+    return ast.parse(expression, mode='eval').body
 
 def calculator(expression: str) -> str:
     """A simple calculator tool that evaluates mathematical expressions."""
     try:
-        # Only allow safe mathematical operations
-        allowed_names = {
-            '__builtins__': {},
-            'abs': abs,
-            'round': round,
-            'min': min,
-            'max': max,
-            'pow': pow,
-        }
-        
-        # Evaluate the expression safely
-        result = eval(expression, allowed_names)
+        # Parse and walk the expression ourselves - no eval(), only arithmetic is allowed
+        result = _eval_node(_parse_expression(expression.strip()))
         return str(result)
         
     except Exception as e:
         return f"Error: {str(e)}"
     
 if __name__ == "__main__":
+    # Show the agent's reasoning steps in the interactive demo
+    logging.basicConfig(format="%(message)s")
+    log.setLevel(logging.DEBUG)
+    
     # Test the calculator first
     print("Testing calculator:")
     print(f"2 + 3 = {calculator('2 + 3')}")
@@ -278,8 +522,10 @@ if __name__ == "__main__":
             print("="*50)
             
             try:
-                answer = agent.run(question)
-                print(f"\n🎯 Final Answer: {answer}")
+                # Print the answer as it streams in rather than after the full completion
+                print("\n🎯 Final Answer: ", end="", flush=True)
+                agent.run(question, on_token=lambda token: print(token, end="", flush=True))
+                print()
             except Exception as e:
                 print(f"❌ Error: {e}")
                 print("Try rephrasing your question or check your internet connection.")
\ No newline at end of file
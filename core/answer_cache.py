@@ -0,0 +1,137 @@
+from pymilvus import DataType
+from core.milvus_manager import MilvusManager
+import asyncio
+import logging
+import time
+import uuid
+
+log = logging.getLogger(__name__)
+
+class AnswerCache(MilvusManager):
+    """
+    Semantic answer cache stored in a dedicated Milvus collection.
+
+    Each row maps the embedding of a question to the agent's final answer, so a
+    semantically equivalent question can be answered without running the ReAct loop.
+    """
+
+    def __init__(self, collection_name: str = "answer_cache", dim: int = 1536, threshold: float = 0.925, ttl_seconds: int = 86400):
+        """
+        Initialize the answer cache collection.
+
+        Parameters:
+        - collection_name: The name of the Milvus collection holding cached answers.
+        - dim: Dimensionality of the question embeddings.
+        - threshold: Minimum cosine similarity for a cached answer to count as a hit.
+        - ttl_seconds: How long a cached answer stays valid.
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        super().__init__(collection_name=collection_name, dim=dim)
+
+    def setup_collection(self):
+        """
+        Create the answer cache collection if it does not exist yet.
+        """
+        log.debug("Setting up answer cache collection: %s", self.collection_name)
+        try:
+            if not self.milvus_client.has_collection(self.collection_name):
+                schema = self.milvus_client.create_schema()
+                schema.add_field("vector_id", DataType.VARCHAR, max_length=255, is_primary=True, description="Unique vector ID")
+                schema.add_field("query_embedding", DataType.FLOAT_VECTOR, dim=self.dim, description="Question embedding")
+                schema.add_field("question", DataType.VARCHAR, max_length=2000, description="Question text")
+                schema.add_field("answer", DataType.VARCHAR, max_length=65535, description="Cached final answer")
+                schema.add_field("ts", DataType.INT64, description="Insertion timestamp")
+
+                index_params = self._build_index_params("query_embedding")
+
+                self.milvus_client.create_collection(
+                    self.collection_name,
+                    dimension=self.dim,
+                    schema=schema,
+                    index_params=index_params
+                )
+                log.info("Created answer cache collection: %s", self.collection_name)
+            else:
+                log.debug("Answer cache collection %s already exists.", self.collection_name)
+        except Exception as e:
+            error_msg = f"Error setting up collection {self.collection_name}: {str(e)}"
+            raise Exception(error_msg)
+
+    def lookup(self, query_embedding: list):
+        """
+        Return the cached answer closest to the query embedding, or None on a miss.
+        """
+        cutoff = int(time.time()) - self.ttl_seconds
+        results = self.search(
+            query_embedding=query_embedding,
+            topk=1,
+            anns_field="query_embedding",
+            filter_expression=f"ts >= {cutoff}",
+            output_fields=["answer"],
+        )
+
+        hits = results[0] if results else []
+        # With the IP metric the returned "distance" is a similarity - higher is closer
+        if hits and hits[0]["distance"] > self.threshold:
+            log.debug("Answer cache hit with similarity %.4f", hits[0]["distance"])
+            self.hits += 1
+            return hits[0]["entity"]["answer"]
+        self.misses += 1
+        return None
+
+    def store(self, question: str, query_embedding: list, answer: str):
+        """
+        Cache the final answer for a question.
+        """
+        # VARCHAR limits are in bytes, not characters
+        if len(answer.encode("utf-8")) > 65535:
+            log.debug("Answer too long to cache, skipping")
+            return
+
+        self.insert_documents([{
+            "vector_id": str(uuid.uuid4()),
+            "query_embedding": query_embedding,
+            "question": question.encode("utf-8")[:2000].decode("utf-8", errors="ignore"),
+            "answer": answer,
+            "ts": int(time.time()),
+        }])
+
+    def sweep_expired(self):
+        """
+        Delete cached answers older than the TTL.
+        """
+        cutoff = int(time.time()) - self.ttl_seconds
+        self.delete_by_filter(f"ts < {cutoff}")
+
+    def clear(self):
+        """
+        Drop every cached answer.
+        """
+        self.delete_all_records()
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counters for this process.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "backend": "milvus",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    async def alookup(self, query_embedding: list):
+        """
+        Async version of lookup().
+        """
+        return await asyncio.to_thread(self.lookup, query_embedding)
+
+    async def astore(self, question: str, query_embedding: list, answer: str):
+        """
+        Async version of store().
+        """
+        return await asyncio.to_thread(self.store, question, query_embedding, answer)
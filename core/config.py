@@ -1,26 +1,50 @@
+import functools
+import json
+import logging
 import os
 from dotenv import load_dotenv
 
-# Force reload of environment variables
-load_dotenv(override=True)
+logger = logging.getLogger(__name__)
 
 class Settings:
     def __init__(self):
+        # Force reload of environment variables
+        load_dotenv(override=True)
+
+        self.OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
+        self.MILVUS_ENDPOINT: str = os.getenv("MILVUS_ENDPOINT")
+        self.MILVUS_PORT: str = os.getenv("MILVUS_PORT")
+        self.MILVUS_TOKEN: str = os.getenv("MILVUS_TOKEN")
+        self.MILVUS_POOL_SIZE: int = int(os.getenv("MILVUS_POOL_SIZE", "8"))  # Clients for document searches
+        self.ALLOWED_ORIGINS: list = ["http://localhost:3000", "http://localhost:5000"]
+        self.DATABASE_URL: str = os.getenv("DATABASE_URL")
+        self.DATABASE_NAME: str = os.getenv("DATABASE_NAME", "postgres")  # Set default if not specified
+        self.OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL")
+        # Index search parameters for document retrieval, e.g. {"ef": 32} for HNSW or
+        # {"nprobe": 8} for IVF; empty means the retrieval defaults
+        self.MILVUS_SEARCH_PARAMS: dict = self._load_json("MILVUS_SEARCH_PARAMS")
+
         # Validate database configuration on initialization
-        if not os.getenv("DATABASE_URL"):
+        if not self.DATABASE_URL:
             raise ValueError("DATABASE_URL environment variable is not set")
-        
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
-    MILVUS_ENDPOINT: str = os.getenv("MILVUS_ENDPOINT")
-    MILVUS_PORT: str = os.getenv("MILVUS_PORT")
-    MILVUS_TOKEN: str = os.getenv("MILVUS_TOKEN")
-    ALLOWED_ORIGINS: list = ["http://localhost:3000", "http://localhost:5000"]
-    DATABASE_URL: str = os.getenv("DATABASE_URL")
-    DATABASE_NAME: str = os.getenv("DATABASE_NAME", "postgres")  # Set default if not specified
-    OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL")
 
-settings = Settings()
+        logger.debug("Loaded DATABASE_NAME: %s", self.DATABASE_NAME)
+
+    @staticmethod
+    def _load_json(name: str) -> dict:
+        """Parse a JSON object from an environment variable (empty if unset)."""
+        value = os.getenv(name)
+        if not value:
+            return {}
+        try:
+            parsed = json.loads(value)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{name} is not valid JSON: {e}")
+        if not isinstance(parsed, dict):
+            raise ValueError(f"{name} must be a JSON object")
+        return parsed
 
-# Debug output
-print(f"Loaded DATABASE_URL: {settings.DATABASE_URL}")
-print(f"Loaded DATABASE_NAME: {settings.DATABASE_NAME}")
\ No newline at end of file
+@functools.lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Load the settings once on first use and return the same instance afterwards."""
+    return Settings()
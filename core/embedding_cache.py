@@ -0,0 +1,66 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache in a local SQLite file, so prompts embedded in earlier
+    runs are not sent to OpenAI again after a restart.
+
+    Rows are keyed by (model, sha256(text)) and hold the vector as float32 bytes.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Open (and create, if needed) the cache database.
+
+        Parameters:
+        - path: Location of the SQLite file; defaults to $EMBEDDING_CACHE_PATH or
+          ~/.cache/mcp/embeddings.db.
+        """
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", os.path.expanduser("~/.cache/mcp/embeddings.db"))
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # One connection shared by every thread; the lock serializes access to it
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS emb ("
+                "model TEXT, hash BLOB, vec BLOB, ts INTEGER, PRIMARY KEY (model, hash))"
+            )
+            self._conn.commit()
+        log.debug("Opened embedding cache at %s", self.path)
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def get(self, text: str, model: str):
+        """
+        Return the cached embedding of a text as a float32 array, or None on a miss.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vec FROM emb WHERE model = ? AND hash = ?", (model, self._key(text))
+            ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, text: str, model: str, embedding: list):
+        """
+        Cache the embedding of a text.
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO emb (model, hash, vec, ts) VALUES (?, ?, ?, ?)",
+                (model, self._key(text), vector.tobytes(), int(time.time())),
+            )
+            self._conn.commit()
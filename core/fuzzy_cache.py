@@ -0,0 +1,81 @@
+from collections import OrderedDict
+import numpy as np
+
+def simhash(text: str, k: int = 4) -> int:
+    """
+    Return the 64-bit SimHash of a text over its k-character shingles.
+
+    The text is lowercased and its whitespace collapsed first, so case and spacing edits
+    don't change the hash, and small edits flip only a few bits. Shingles are hashed
+    with the built-in (per-process salted) hash, so values are only comparable within
+    one process.
+    """
+    normalized = " ".join(text.lower().split())
+    shingles = {normalized[i:i + k] for i in range(max(len(normalized) - k + 1, 1))}
+    hashes = np.array([hash(shingle) for shingle in shingles], dtype=np.int64).view(np.uint64)
+    # Each output bit is the majority vote of that bit over all shingle hashes
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(-1, 64)
+    return int.from_bytes(np.packbits(2 * bits.sum(axis=0) > len(shingles)).tobytes(), "big")
+
+class FuzzyCache:
+    """
+    In-process cache keyed by the SimHash of a text, so an edited version of a cached
+    text (a fixed typo, changed spacing) finds its value without an exact match.
+
+    Hashes within max_distance bits of each other count as the same text. They are
+    found through max_distance + 1 bands of the hash: by the pigeonhole principle two
+    such hashes agree on at least one whole band, so a lookup only compares against
+    the entries sharing a band instead of scanning them all.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_distance: int = 3):
+        """
+        Initialize an empty cache.
+
+        Parameters:
+        - max_entries: Maximum number of cached values; the least recently used are evicted.
+        - max_distance: Maximum number of differing SimHash bits that still counts as a hit.
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.band_bits = 64 // (max_distance + 1)
+        self.entries = OrderedDict()  # simhash -> value
+        self.bands = [{} for _ in range(max_distance + 1)]  # band value -> set of simhashes
+
+    def _band_keys(self, key: int):
+        mask = (1 << self.band_bits) - 1
+        return [(key >> (i * self.band_bits)) & mask for i in range(len(self.bands))]
+
+    def get(self, text: str):
+        """
+        Return the value cached for a text or a near-identical one, or None on a miss.
+        """
+        key = simhash(text)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        for band, band_key in zip(self.bands, self._band_keys(key)):
+            for candidate in band.get(band_key, ()):
+                if bin(candidate ^ key).count("1") <= self.max_distance:
+                    self.entries.move_to_end(candidate)
+                    return self.entries[candidate]
+        return None
+
+    def put(self, text: str, value):
+        """
+        Cache a value for a text.
+        """
+        key = simhash(text)
+        if key not in self.entries:
+            for band, band_key in zip(self.bands, self._band_keys(key)):
+                band.setdefault(band_key, set()).add(key)
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.max_entries:
+            oldest, _ = self.entries.popitem(last=False)
+            for band, band_key in zip(self.bands, self._band_keys(oldest)):
+                members = band[band_key]
+                members.discard(oldest)
+                if not members:
+                    del band[band_key]
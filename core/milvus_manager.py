@@ -1,6 +1,83 @@
 from pymilvus import MilvusClient, DataType, MilvusException
-from core.config import settings
+from pymilvus.exceptions import ConnectionNotExistException, MilvusUnavailableException
+from core.config import get_settings
+import asyncio
+import grpc
+import logging
+import openai
+import sys
+import threading
 import time
+import uuid
+
+log = logging.getLogger(__name__)
+
+# OpenAI embeddings are unit-length, so inner product equals cosine similarity (higher is closer)
+METRIC_TYPE = "IP"
+
+# Build and default search parameters per supported index type:
+# - HNSW keeps full-precision vectors (M neighbours per node, ef candidates per query, ef >= topk)
+# - IVF_SQ8 scalar-quantizes vectors to int8, storing them 4x smaller at a small recall cost
+INDEX_CONFIGS = {
+    "HNSW": {"params": {"M": 16, "efConstruction": 200}, "search_params": {"ef": 64}},
+    "IVF_SQ8": {"params": {"nlist": 1024}, "search_params": {"nprobe": 16}},
+}
+
+# Maximum number of inputs the OpenAI embeddings endpoint accepts per request
+EMBEDDING_BATCH_SIZE = 2048
+
+_clients = {}  # (uri, token, channel) -> MilvusClient
+_client_lock = threading.Lock()
+
+def _invalidate_search_results(user_ids: set):
+    """
+    Expire the cached RAG search results of users whose documents changed.
+    """
+    # utils.rag_search imports this module, so look it up instead of importing it; if it
+    # isn't loaded, this process has no cached results to expire
+    rag_search = sys.modules.get("utils.rag_search")
+    if rag_search is not None:
+        for user_id in user_ids:
+            rag_search.invalidate_user_results(user_id)
+
+def _get_client(uri: str, token: str = None, channel: int = 0):
+    """
+    Return a shared MilvusClient for the given endpoint, so every MilvusManager reuses
+    one gRPC channel instead of reconnecting. The channel itself is thread-safe; the
+    lock only keeps two threads from constructing the same client at once. Callers that
+    fan out many concurrent requests can spread them over several clients by channel
+    number.
+    """
+    with _client_lock:
+        key = (uri, token, channel)
+        if key not in _clients:
+            _clients[key] = MilvusClient(uri=uri, token=token or "")
+        return _clients[key]
+
+def _drop_client(uri: str, token: str = None, channel: int = 0):
+    """
+    Forget the shared MilvusClient of a channel, so the next _get_client() for it opens
+    a new connection. Returns the dropped client, or None if there was none.
+    """
+    with _client_lock:
+        return _clients.pop((uri, token, channel), None)
+
+# Errors meaning the connection itself is unusable, as opposed to a bad request
+_CONNECTION_ERRORS = (MilvusUnavailableException, ConnectionNotExistException, ConnectionError)
+_UNAVAILABLE_STATUSES = (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED)
+
+def is_connection_error(error: BaseException) -> bool:
+    """
+    Return whether an error (or the error it was raised from) comes from a dead or
+    unreachable Milvus connection, rather than e.g. an invalid filter or schema.
+    """
+    while error is not None:
+        if isinstance(error, _CONNECTION_ERRORS):
+            return True
+        if isinstance(error, grpc.RpcError) and error.code() in _UNAVAILABLE_STATUSES:
+            return True
+        error = error.__cause__
+    return False
 
 class MilvusManager:
     """
@@ -11,25 +88,31 @@ class MilvusManager:
     - Searching, querying, and deleting documents
     """
 
-    def __init__(self, collection_name: str = "client_documents", dim: int = 1536):
+    def __init__(self, collection_name: str = "client_documents", dim: int = 1536, index_type: str = "HNSW", channel: int = 0):
         """
         Initialize the Milvus client and set up the collection.
 
         Parameters:
         - collection_name: The name of the Milvus collection.
         - dim: Dimensionality of the embedding vectors.
+        - index_type: Vector index used when creating the collection (a key of INDEX_CONFIGS).
+        - channel: Which shared client (gRPC channel) to the endpoint this manager uses.
         """
-        print(f"Initializing MilvusManager with collection: {collection_name}, dim: {dim}")
+        log.info("Initializing MilvusManager with collection: %s, dim: %d", collection_name, dim)
         
         # Initialize the Milvus client using configuration settings
         try:
-            self.milvus_client = MilvusClient(uri=settings.MILVUS_ENDPOINT)
+            settings = get_settings()
+            self.milvus_client = _get_client(settings.MILVUS_ENDPOINT, settings.MILVUS_TOKEN, channel)
+            self.channel = channel
             self.collection_name = collection_name
             self.dim = dim
+            self.index_type = index_type
+            self.default_search_params = {"metric_type": METRIC_TYPE, "params": INDEX_CONFIGS[index_type]["search_params"]}
+            self.openai_client = None  # Created on first use by insert_texts
 
             # Log the connection status
-            connection_msg = f"Connected to Milvus at: {settings.MILVUS_ENDPOINT}"
-            print(f"[MilvusManager] {connection_msg}")
+            log.info("Connected to Milvus at: %s", settings.MILVUS_ENDPOINT)
 
             # Ensure that the collection exists and is configured correctly
             self.setup_collection()
@@ -37,14 +120,22 @@ class MilvusManager:
             error_msg = f"Failed to initialize Milvus client: {str(e)}"
             raise Exception(error_msg)
 
+    def drop_client(self):
+        """
+        Drop this manager's shared client, so managers created afterwards on the same
+        channel reconnect instead of reusing a dead connection. Returns the dropped client.
+        """
+        settings = get_settings()
+        return _drop_client(settings.MILVUS_ENDPOINT, settings.MILVUS_TOKEN, self.channel)
+
     def setup_collection(self):
         """
         Check whether the collection exists. If not, create it with the proper schema and index configuration.
         """
-        print(f"Setting up collection: {self.collection_name}")
+        log.debug("Setting up collection: %s", self.collection_name)
         try:
             if not self.milvus_client.has_collection(self.collection_name):
-                print(f"Collection {self.collection_name} does not exist, creating it")
+                log.info("Collection %s does not exist, creating it", self.collection_name)
                 
                 # Create a new schema object
                 schema = self.milvus_client.create_schema()
@@ -56,12 +147,9 @@ class MilvusManager:
                 schema.add_field("document_embeddings", DataType.FLOAT_VECTOR, dim=self.dim, description="Document embeddings")
                 schema.add_field("upload_timestamp", DataType.INT64, description="Upload timestamp")
                 schema.add_field("chunk_text", DataType.VARCHAR, max_length=2000, description="Chunk text")
-                print("Schema created with all required fields")
 
-                # Prepare index parameters (using the L2 metric for similarity)
-                index_params = self.milvus_client.prepare_index_params()
-                index_params.add_index("document_embeddings", metric_type="L2")
-                print("Index parameters prepared")
+                # Prepare index parameters for the configured index type
+                index_params = self._build_index_params("document_embeddings")
 
                 # Create the collection with the specified schema and index parameters
                 self.milvus_client.create_collection(
@@ -70,97 +158,172 @@ class MilvusManager:
                     schema=schema,
                     index_params=index_params
                 )
-                creation_msg = f"Created collection: {self.collection_name}"
-                print(f"[MilvusManager] {creation_msg}")
+                log.info("Created collection: %s", self.collection_name)
             else:
-                exists_msg = f"Collection {self.collection_name} already exists."
-                print(f"[MilvusManager] {exists_msg}")
+                log.debug("Collection %s already exists.", self.collection_name)
         except Exception as e:
             error_msg = f"Error setting up collection {self.collection_name}: {str(e)}"
             raise Exception(error_msg)
 
-    def insert_documents(self, documents: list):
+    def _build_index_params(self, field_name: str):
+        """
+        Prepare index parameters for the configured index type on the given vector field.
+        """
+        index_params = self.milvus_client.prepare_index_params()
+        index_params.add_index(
+            field_name,
+            index_type=self.index_type,
+            metric_type=METRIC_TYPE,
+            params=INDEX_CONFIGS[self.index_type]["params"]
+        )
+        return index_params
+
+    def insert_documents(self, documents: list, batch_size: int = 1000, sync: bool = False):
         """
         Insert a list of document rows into the collection.
 
         Parameters:
         - documents: A list of dictionaries where each dictionary represents a document.
+        - batch_size: Maximum number of rows sent per insert request.
+        - sync: Flush the collection before returning (blocks until segments are sealed;
+          Milvus auto-flushes otherwise).
         """
-        print(f"Inserting {len(documents)} documents into collection {self.collection_name}")
+        log.debug("Inserting %d documents into collection %s", len(documents), self.collection_name)
         start_time = time.time()
         
         try:
-            for i, row in enumerate(documents):
-                # Insert each document row into the collection
-                self.milvus_client.insert(self.collection_name, [row])
-                if i % 10 == 0 and i > 0:  # Log progress for every 10 documents
-                    print(f"Inserted {i}/{len(documents)} documents")
-            self.milvus_client.flush(self.collection_name)
+            # Insert rows in batches - one RPC per batch instead of one per row
+            for start in range(0, len(documents), batch_size):
+                self.milvus_client.insert(self.collection_name, documents[start:start + batch_size])
+            if sync:
+                self.milvus_client.flush(self.collection_name)
             
             elapsed_time = time.time() - start_time
-            print(f"Successfully inserted {len(documents)} documents in {elapsed_time:.2f} seconds")
+            log.debug("Inserted %d documents in %.2f seconds", len(documents), elapsed_time)
         except MilvusException as e:
             error_msg = f"Error inserting documents: {str(e)}"
             raise Exception(error_msg)
+        finally:
+            # Even a partial insert changes what the users' searches should return
+            _invalidate_search_results({document.get("user_id") for document in documents})
 
-    def search(self, query_embedding: list, topk: int = 3, search_params: dict = None, anns_field: str = "document_embeddings", filter_expression: list[str] = None, filter_params: dict = None):
+    def insert_texts(self, texts: list, user_id: str, document_id: str, document_name: str, model: str = "text-embedding-3-small"):
+        """
+        Embed text chunks of a document and insert them into the collection.
+
+        Parameters:
+        - texts: The chunk texts to embed (each at most 2000 bytes, the chunk_text limit).
+        - user_id: The ID of the user owning the document.
+        - document_id: The ID of the document the chunks belong to.
+        - document_name: The name of the document.
+        - model: The OpenAI embedding model (its output is truncated to the collection's dim).
+        """
+        log.debug("Embedding %d chunks for document %s", len(texts), document_id)
+        if self.openai_client is None:
+            self.openai_client = openai.OpenAI(api_key=get_settings().OPENAI_API_KEY)
+
+        # One embeddings request per batch of up to 2048 chunks instead of one per chunk
+        embeddings = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            response = self.openai_client.embeddings.create(
+                model=model,
+                input=texts[start:start + EMBEDDING_BATCH_SIZE],
+                dimensions=self.dim
+            )
+            embeddings.extend(item.embedding for item in response.data)
+
+        upload_timestamp = int(time.time())
+        documents = [
+            {
+                "vector_id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "document_id": document_id,
+                "document_name": document_name,
+                "document_embeddings": embedding,
+                "upload_timestamp": upload_timestamp,
+                "chunk_text": text,
+            }
+            for text, embedding in zip(texts, embeddings)
+        ]
+        self.insert_documents(documents)
+
+    def search(self, query_embedding: list, topk: int = 3, search_params: dict = None, anns_field: str = "document_embeddings", filter_expression: list[str] = None, filter_params: dict = None, output_fields: list = ("document_id",)):
         """
         Search for similar documents using the provided query embedding.
 
         Parameters:
         - query_embedding: The embedding vector to search for.
         - limit: Number of top results to return.
-        - search_params: Dictionary of search parameters.
+        - search_params: Dictionary of search parameters (defaults to the index type's settings).
         - anns_field: The collection field that holds the embeddings.
+        - filter_expression: Boolean filter on scalar fields, optionally with {placeholders}.
+        - filter_params: Values for the filter's placeholders. Keeping values out of the
+          expression text lets Milvus reuse the parsed filter across searches.
+        - output_fields: Fields to return with each hit. Defaults to document_id only, since
+          chunk_text can be up to 2 KB per hit; request it explicitly or use fetch_chunk().
 
         Returns:
         - Search results from Milvus.
         """
-        print(f"Searching collection {self.collection_name} for top {topk} results")
-        if filter_expression:
-            print(f"Using filter expression: {filter_expression}")
+        return self.search_batch([query_embedding], topk, search_params, anns_field, filter_expression, filter_params, output_fields)
+
+    def search_batch(self, query_embeddings: list, topk: int = 3, search_params: dict = None, anns_field: str = "document_embeddings", filter_expression: list[str] = None, filter_params: dict = None, output_fields: list = ("document_id",)):
+        """
+        Search for several query embeddings in a single request.
+
+        Parameters:
+        - query_embeddings: The embedding vectors to search for.
+        - Other parameters as for search().
+
+        Returns:
+        - Search results from Milvus: one list of hits per query embedding, in order.
+        """
+        log.debug("Searching collection %s for top %d results of %d queries (filter: %s)", self.collection_name, topk, len(query_embeddings), filter_expression)
         
+        # Only templated filters carry parameters
+        extra = {"filter_params": filter_params} if filter_params else {}
         try:
             start_time = time.time()
             results = self.milvus_client.search(
                 self.collection_name,
-                [query_embedding],
+                query_embeddings,
                 limit=topk,
-                search_params=search_params,
+                search_params=search_params or self.default_search_params,
                 anns_field=anns_field,
                 filter=filter_expression,
-                output_fields=["chunk_text", "document_id"]
+                output_fields=list(output_fields),
+                **extra
             )
             elapsed_time = time.time() - start_time
             
-            result_count = len(results) if results else 0
-            print(f"Search completed in {elapsed_time:.2f} seconds, found {result_count} results")
+            log.debug("Search completed in %.2f seconds, found %d results", elapsed_time, len(results) if results else 0)
             return results
         except MilvusException as e:
             error_msg = f"Error during search: {str(e)}"
-            raise Exception(error_msg)
+            raise Exception(error_msg) from e
 
-    def delete_by_filter(self, filter_expr: str):
+    def delete_by_filter(self, filter_expr: str, sync: bool = False):
         """
         Delete documents from the collection using a filter expression.
 
         Parameters:
         - filter_expr: The filter expression to identify documents for deletion.
+        - sync: Flush the collection before returning (Milvus auto-flushes otherwise).
         """
-        print(f"Deleting documents from collection {self.collection_name} with filter: {filter_expr}")
+        log.debug("Deleting documents from collection %s with filter: %s", self.collection_name, filter_expr)
         
         try:
             # Delete documents that match the filter expression
             start_time = time.time()
             delete_result = self.milvus_client.delete(collection_name=self.collection_name, filter=filter_expr)
             
-            # Flush the collection to commit the deletion
-            print("Flushing collection to commit deletion")
-            self.milvus_client.flush(self.collection_name)
+            # Flush the collection to commit the deletion only when asked to
+            if sync:
+                self.milvus_client.flush(self.collection_name)
             
             elapsed_time = time.time() - start_time
             deleted_count = delete_result.get("delete_count", 0) if isinstance(delete_result, dict) else "unknown"
-            print(f"Deleted {deleted_count} documents in {elapsed_time:.2f} seconds")
+            log.debug("Deleted %s documents in %.2f seconds", deleted_count, elapsed_time)
         except MilvusException as e:
             error_msg = f"Error deleting documents: {str(e)}"
             raise Exception(error_msg)
@@ -169,33 +332,12 @@ class MilvusManager:
         """
         Delete ALL records from the collection without any filter.
         This will completely empty the collection but keep the schema intact.
+
+        Dropping and recreating the collection is a metadata operation, unlike a
+        match-everything delete filter which has to mark every row.
         """
-        print(f"Deleting ALL records from collection {self.collection_name}")
-        
-        try:
-            start_time = time.time()
-            
-            # First, get the count of total records
-            stats = self.milvus_client.get_collection_stats(self.collection_name)
-            total_records = stats.get("row_count", 0)
-            print(f"Total records to delete: {total_records}")
-            
-            # Delete all records using a filter that matches everything
-            # Using a filter that will match all records with any vector_id
-            filter_expr = "vector_id != ''"
-            delete_result = self.milvus_client.delete(collection_name=self.collection_name, filter=filter_expr)
-            
-            # Flush the collection to commit the deletion
-            print("Flushing collection to commit deletion")
-            self.milvus_client.flush(self.collection_name)
-            
-            elapsed_time = time.time() - start_time
-            deleted_count = delete_result.get("delete_count", 0) if isinstance(delete_result, dict) else "unknown"
-            print(f"Deleted ALL {deleted_count} records from collection in {elapsed_time:.2f} seconds")
-            
-        except MilvusException as e:
-            error_msg = f"Error deleting all records: {str(e)}"
-            raise Exception(error_msg)
+        log.warning("Deleting ALL records from collection %s", self.collection_name)
+        self.recreate_collection()
 
     def recreate_collection(self):
         """
@@ -203,54 +345,101 @@ class MilvusManager:
         This will delete everything and start fresh with the same schema.
         WARNING: This will permanently delete all data in the collection.
         """
-        print(f"Recreating collection {self.collection_name} - ALL DATA WILL BE LOST")
+        log.warning("Recreating collection %s - ALL DATA WILL BE LOST", self.collection_name)
         
         try:
             start_time = time.time()
             
             # Drop the existing collection if it exists
             if self.milvus_client.has_collection(self.collection_name):
-                print(f"Dropping existing collection: {self.collection_name}")
                 self.milvus_client.drop_collection(self.collection_name)
-                print(f"Collection {self.collection_name} dropped successfully")
+                log.info("Dropped collection: %s", self.collection_name)
             
             # Recreate the collection with the same schema
-            print(f"Recreating collection: {self.collection_name}")
             self.setup_collection()
             
             elapsed_time = time.time() - start_time
-            print(f"Collection {self.collection_name} recreated successfully in {elapsed_time:.2f} seconds")
+            log.info("Collection %s recreated in %.2f seconds", self.collection_name, elapsed_time)
             
         except MilvusException as e:
             error_msg = f"Error recreating collection: {str(e)}"
             raise Exception(error_msg)
 
-    def query_by_filter(self, filter_expr: str, output_fields: list):
+    def fetch_chunk(self, vector_id: str):
+        """
+        Fetch the chunk text for a single vector ID, for callers that searched without it.
+
+        Returns:
+        - The chunk text, or None if no row has that ID.
+        """
+        rows = self.query_by_filter("vector_id == {vid}", ["chunk_text"], filter_params={"vid": vector_id})
+        return rows[0]["chunk_text"] if rows else None
+
+    def query_by_filter(self, filter_expr: str, output_fields: list, include_embeddings: bool = False, filter_params: dict = None):
         """
         Query the collection using a filter expression and return the specified fields.
 
         Parameters:
         - filter_expr: The filter expression (e.g., "client_id == 123").
         - output_fields: List of fields to include in the result.
+        - include_embeddings: Must be set to return the embedding vector field (6 KB per row).
+        - filter_params: Values for {placeholders} in the filter expression, as for search().
 
         Returns:
         - A list of dictionaries containing the queried fields.
         """
-        print(f"Querying collection {self.collection_name} with filter: {filter_expr}")
-        print(f"Requesting output fields: {output_fields}")
+        if "document_embeddings" in output_fields and not include_embeddings:
+            raise ValueError("Refusing to return document_embeddings without include_embeddings=True")
+
+        log.debug("Querying collection %s with filter: %s, output fields: %s", self.collection_name, filter_expr, output_fields)
         
+        # Only templated filters carry parameters
+        extra = {"filter_params": filter_params} if filter_params else {}
         try:
             start_time = time.time()
             results = self.milvus_client.query(
                 collection_name=self.collection_name,
                 filter=filter_expr,
-                output_fields=output_fields
+                output_fields=output_fields,
+                **extra
             )
             elapsed_time = time.time() - start_time
             
-            result_count = len(results) if results else 0
-            print(f"Query completed in {elapsed_time:.2f} seconds, returned {result_count} results")
+            log.debug("Query completed in %.2f seconds, returned %d results", elapsed_time, len(results) if results else 0)
             return results
         except MilvusException as e:
             error_msg = f"Error querying documents: {str(e)}"
-            raise Exception(error_msg) 
\ No newline at end of file
+            raise Exception(error_msg) 
+
+    # Async variants: pymilvus calls are blocking RPCs, so run them in a worker thread
+    # to keep the event loop free while Milvus responds.
+
+    async def ainsert_documents(self, documents: list, batch_size: int = 1000, sync: bool = False):
+        """
+        Async version of insert_documents().
+        """
+        return await asyncio.to_thread(self.insert_documents, documents, batch_size, sync)
+
+    async def asearch(self, *args, **kwargs):
+        """
+        Async version of search(); accepts the same arguments.
+        """
+        return await asyncio.to_thread(self.search, *args, **kwargs)
+
+    async def asearch_batch(self, *args, **kwargs):
+        """
+        Async version of search_batch(); accepts the same arguments.
+        """
+        return await asyncio.to_thread(self.search_batch, *args, **kwargs)
+
+    async def adelete_by_filter(self, filter_expr: str, sync: bool = False):
+        """
+        Async version of delete_by_filter().
+        """
+        return await asyncio.to_thread(self.delete_by_filter, filter_expr, sync)
+
+    async def aquery_by_filter(self, filter_expr: str, output_fields: list, include_embeddings: bool = False, filter_params: dict = None):
+        """
+        Async version of query_by_filter().
+        """
+        return await asyncio.to_thread(self.query_by_filter, filter_expr, output_fields, include_embeddings, filter_params)
@@ -0,0 +1,76 @@
+import hashlib
+import re
+from collections import OrderedDict
+
+# Numeric literals in a question become slots, so questions differing only in numbers share a plan
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+class PlanCache:
+    """
+    In-process cache of the tool calls the agent made for a question shape.
+
+    Questions are normalized (lowercased, numbers replaced by <NUM>) and hashed together
+    with a version string, so a change to the prompt or tools invalidates every plan. On a
+    hit the question's numbers are substituted back into the cached tool inputs.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize an empty plan cache.
+
+        Parameters:
+        - max_entries: Maximum number of cached plans; the least recently used are evicted.
+        """
+        self.max_entries = max_entries
+        self.plans = OrderedDict()  # key -> [(tool_name, input_template), ...]
+
+    def _key(self, question: str, version: str) -> str:
+        normalized = " ".join(_NUMBER_RE.sub("<NUM>", question.lower()).split())
+        return hashlib.sha256(f"{version}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def _template(self, tool_input: str, numbers: list):
+        """Turn a tool input into a format string over the question's numbers, or None."""
+        if not isinstance(tool_input, str):
+            return None
+        parts = []
+        last = 0
+        for match in _NUMBER_RE.finditer(tool_input):
+            # A number the question doesn't contain (e.g. an intermediate result) won't carry over
+            if match.group() not in numbers:
+                return None
+            parts.append(tool_input[last:match.start()].replace("{", "{{").replace("}", "}}"))
+            parts.append("{%d}" % numbers.index(match.group()))
+            last = match.end()
+        parts.append(tool_input[last:].replace("{", "{{").replace("}", "}}"))
+        return "".join(parts)
+
+    def lookup(self, question: str, version: str):
+        """
+        Return the cached (tool_name, tool_input) steps for a question, or None on a miss.
+        """
+        key = self._key(question, version)
+        plan = self.plans.get(key)
+        if plan is None:
+            return None
+        self.plans.move_to_end(key)
+        numbers = _NUMBER_RE.findall(question)
+        return [(tool_name, template.format(*numbers)) for tool_name, template in plan]
+
+    def store(self, question: str, version: str, steps: list):
+        """
+        Cache the (tool_name, tool_input) steps executed to answer a question.
+        Plans that depend on values not present in the question are not cached.
+        """
+        numbers = _NUMBER_RE.findall(question)
+        plan = []
+        for tool_name, tool_input in steps:
+            template = self._template(tool_input, numbers)
+            if template is None:
+                return
+            plan.append((tool_name, template))
+
+        key = self._key(question, version)
+        self.plans[key] = plan
+        self.plans.move_to_end(key)
+        if len(self.plans) > self.max_entries:
+            self.plans.popitem(last=False)
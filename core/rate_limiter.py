@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+class RateLimiter:
+    """
+    Async token bucket that allows `rate` requests per `period` seconds.
+
+    Bursts of up to `rate` requests pass immediately; after that, callers wait for the
+    bucket to refill instead of being rejected by the provider with a 429.
+    """
+
+    def __init__(self, rate: int, period: float = 60.0):
+        """
+        Initialize a full bucket.
+
+        Parameters:
+        - rate: Number of requests allowed per period.
+        - period: Length of the period in seconds.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.period = period
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Wait until a request may be sent, then consume one token.
+        """
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.period)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) * self.period / self.rate)
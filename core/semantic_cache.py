@@ -0,0 +1,159 @@
+import logging
+import time
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Rows dequantized per matrix-vector product when the cache stores int8 embeddings
+_DEQUANTIZE_ROWS = 2048
+
+class SemanticCache:
+    """
+    In-process semantic answer cache, used when no Milvus endpoint is configured.
+
+    Question embeddings are kept as the rows of one preallocated, L2-normalized float32
+    matrix used as a ring buffer, so a lookup is a single matrix-vector product and a
+    store overwrites the oldest row in place instead of reallocating the matrix.
+
+    With quantize=True the rows are stored as int8 with one scale per row instead,
+    taking a quarter of the memory. Exposes the same lookup/store interface as
+    AnswerCache, plus an optional namespace that keeps entries of different owners apart.
+    """
+
+    def __init__(self, dim: int = 1536, threshold: float = 0.95, ttl_seconds: int = 86400, max_entries: int = 10000, quantize: bool = False):
+        """
+        Initialize an empty cache.
+
+        Parameters:
+        - dim: Dimensionality of the question embeddings.
+        - threshold: Minimum cosine similarity for a cached answer to count as a hit.
+        - ttl_seconds: How long a cached answer stays valid.
+        - max_entries: Maximum number of cached answers; the oldest are evicted first.
+        - quantize: Store embeddings as int8 (4x smaller, lookups about 2x slower).
+        """
+        self.dim = dim
+        self.quantize = quantize
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.clear()
+
+    def clear(self):
+        """
+        Drop every cached answer.
+        """
+        self.embeddings = np.empty((0, self.dim), dtype=np.int8 if self.quantize else np.float32)
+        self.scales = np.empty(0, dtype=np.float32)
+        self.timestamps = np.empty(0, dtype=np.float64)
+        self.namespaces = np.empty(0, dtype=object)
+        self.answers = []
+        self.size = 0  # rows in use
+        self.next = 0  # row the next store writes to
+
+    def invalidate(self, namespace: str = None):
+        """
+        Expire every cached answer stored under a namespace.
+        """
+        self.timestamps[:self.size][self.namespaces[:self.size] == namespace] = -np.inf
+
+    def _grow(self):
+        """Double the row capacity (up to max_entries), keeping the rows in use."""
+        capacity = min(max(2 * len(self.embeddings), 64), self.max_entries)
+        for name in ("embeddings", "scales", "timestamps", "namespaces"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _normalize(self, embedding: list) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _scores(self, vector: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every cached embedding to a normalized vector."""
+        rows = self.embeddings[:self.size]
+        if not self.quantize:
+            return rows @ vector
+        # Dequantize a block of rows at a time, so the float32 copy stays small while the
+        # product itself still runs as a BLAS matrix-vector multiply
+        scores = np.empty(self.size, dtype=np.float32)
+        for start in range(0, self.size, _DEQUANTIZE_ROWS):
+            block = rows[start:start + _DEQUANTIZE_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ vector
+        return scores * self.scales[:self.size]
+
+    def _quantize(self, vector: np.ndarray):
+        """Return a normalized vector as (int8 row, scale)."""
+        scale = float(np.abs(vector).max()) / 127 or 1.0
+        return np.round(vector / scale).astype(np.int8), scale
+
+    def lookup(self, query_embedding: list, namespace: str = None):
+        """
+        Return the cached answer closest to the query embedding, or None on a miss.
+        Only entries stored under the same namespace are considered.
+        """
+        if self.size:
+            scores = self._scores(self._normalize(query_embedding))
+            scores[self.timestamps[:self.size] < time.time() - self.ttl_seconds] = -1.0
+            scores[self.namespaces[:self.size] != namespace] = -1.0
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                self.hits += 1
+                log.debug("Semantic cache hit with similarity %.4f", scores[best])
+                return self.answers[best]
+        self.misses += 1
+        return None
+
+    def store(self, question: str, query_embedding: list, answer: str, namespace: str = None):
+        """
+        Cache the final answer for a question, under an optional namespace.
+        """
+        vector = self._normalize(query_embedding)
+        scale = 1.0
+        if self.quantize:
+            vector, scale = self._quantize(vector)
+        if self.size == len(self.embeddings) < self.max_entries:
+            self._grow()
+
+        # Until the cache is full rows are filled in order; after that the write position
+        # wraps around and overwrites the oldest entry
+        row = self.next
+        self.embeddings[row] = vector
+        self.scales[row] = scale
+        self.timestamps[row] = time.time()
+        self.namespaces[row] = namespace
+        if row == len(self.answers):
+            self.answers.append(answer)
+        else:
+            self.answers[row] = answer
+        self.size = min(self.size + 1, self.max_entries)
+        self.next = (row + 1) % self.max_entries
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counters and the number of cached answers.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    # Lookups are a single in-memory matrix product, so the async variants run inline
+
+    async def alookup(self, query_embedding: list, namespace: str = None):
+        """
+        Async version of lookup().
+        """
+        return self.lookup(query_embedding, namespace)
+
+    async def astore(self, question: str, query_embedding: list, answer: str, namespace: str = None):
+        """
+        Async version of store().
+        """
+        return self.store(question, query_embedding, answer, namespace)
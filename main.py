@@ -1,18 +1,23 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
+import json
+import logging
 import os
-from agents.main_agent import ReActAgent, calculator, web_search, text_analyzer
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from agents.main_agent import ReActAgent
+from core.plan_cache import PlanCache
+from tools.search_with_serp_api import aclose_async_client
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(
-    title="ReAct Agent Chat API",
-    description="A FastAPI wrapper for the ReAct (Reasoning and Acting) Agent that automatically determines which tools to use",
-    version="1.0.0"
-)
+log = logging.getLogger(__name__)
 
 # Pydantic models for request/response
 class ChatRequest(BaseModel):
@@ -40,13 +45,60 @@ def get_agent():
         if not api_key:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
-        agent = ReActAgent(api_key)
-        agent.add_tool("calculator", calculator, "Evaluates mathematical expressions")
-        agent.add_tool("web_search", web_search, "Searches the web for current information")
-        agent.add_tool("text_analyzer", text_analyzer, "Analyzes text statistics and insights")
+        # Cache answers in Milvus when it is configured, otherwise in process memory
+        answer_cache = None
+        if os.getenv('MILVUS_ENDPOINT'):
+            try:
+                from core.answer_cache import AnswerCache
+                answer_cache = AnswerCache()
+            except Exception as e:
+                log.warning("Milvus answer cache disabled: %s", e)
+        if answer_cache is None:
+            from core.semantic_cache import SemanticCache
+            answer_cache = SemanticCache(quantize=True)
+        
+        # Default tools (and their cache TTLs) are registered by the agent itself
+        agent = ReActAgent(api_key, answer_cache=answer_cache, plan_cache=PlanCache())
     
     return agent
 
+def start_logging() -> QueueListener:
+    """Route log records through a queue so request handlers never block on log file I/O"""
+    file_handler = RotatingFileHandler(os.getenv('LOG_FILE', 'agent.log'), maxBytes=10_000_000, backupCount=3)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    
+    log_queue = queue.Queue(-1)
+    root_logger = logging.getLogger()
+    root_logger.addHandler(QueueHandler(log_queue))
+    root_logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the agent and its caches at boot, and close pooled connections at shutdown"""
+    log_listener = start_logging()
+    # Warm up before the first request instead of during it (skipped if unconfigured,
+    # so the health check can still report the missing key)
+    if os.getenv('OPENAI_API_KEY'):
+        get_agent()
+    yield
+    await aclose_async_client()
+    if agent is not None:
+        await agent.client.close()
+        if agent.chat_client is not agent.client:
+            await agent.chat_client.close()
+    log_listener.stop()
+
+app = FastAPI(
+    title="ReAct Agent Chat API",
+    description="A FastAPI wrapper for the ReAct (Reasoning and Acting) Agent that automatically determines which tools to use",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Health check endpoint with configuration status"""
@@ -75,10 +127,8 @@ async def chat(request: ChatRequest):
     """
     try:
         agent = get_agent()
-        if request.max_iterations:
-            agent.max_iterations = request.max_iterations
-        
-        response = agent.run(request.message)
+        # Per-request limit - the agent is shared, so its defaults must not be mutated
+        response = await agent.arun(request.message, max_iterations=request.max_iterations)
         
         return ChatResponse(
             message=request.message,
@@ -87,6 +137,47 @@ async def chat(request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Same as /chat, but streams the response as server-sent events while it is generated.
+    Each event carries a JSON-encoded chunk of text; a final "done" event carries the full response.
+    """
+    agent = get_agent()
+    tokens = asyncio.Queue()
+    task = asyncio.create_task(agent.arun(request.message, on_token=tokens.put_nowait, max_iterations=request.max_iterations))
+    task.add_done_callback(lambda _: tokens.put_nowait(None))
+    
+    async def events():
+        try:
+            while (token := await tokens.get()) is not None:
+                yield f"data: {json.dumps(token)}\n\n"
+            error = "cancelled" if task.cancelled() else task.exception()
+            if error:
+                yield f"event: error\ndata: {json.dumps(f'Error processing message: {error}')}\n\n"
+            else:
+                yield f"event: done\ndata: {json.dumps(task.result())}\n\n"
+        finally:
+            # Stop the agent if the client went away mid-stream
+            task.cancel()
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss statistics of the semantic answer cache"""
+    return get_agent().answer_cache.stats()
+
+@app.post("/cache/clear")
+async def cache_clear():
+    """Remove every cached answer"""
+    try:
+        await asyncio.to_thread(get_agent().answer_cache.clear)
+        return {"status": "cleared"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error clearing cache: {str(e)}")
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # uvloop and httptools ship with uvicorn[standard]
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools") 
\ No newline at end of file
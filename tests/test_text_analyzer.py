@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from tools import text_analyzer as ta
+
+
+def _reference_counts(text):
+    """Uppercase, lowercase and space counts by the plain per-character definitions."""
+    return (
+        sum(1 for c in text if c.isupper()),
+        sum(1 for c in text if c.islower()),
+        text.count(' '),
+    )
+
+
+def _random_ascii(length, seed):
+    rng = random.Random(seed)
+    alphabet = "abcXYZ .,!\t\n0123456789@[`{"
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def test_count_chars_uses_compiled_kernel():
+    pytest.importorskip("numba")
+    assert ta.count_classes is not None
+    for length in (0, 1, 7, 8, 9, 63, 1000):
+        text = _random_ascii(length, length)
+        assert tuple(int(n) for n in ta._count_chars(text)) == _reference_counts(text)
+
+
+def test_text_analyzer_small_ascii_input():
+    pytest.importorskip("numba")
+    result = ta.text_analyzer("Hello World. Foo bar")
+    assert "Analysis error" not in result
+    assert "- Uppercase letters: 3" in result
+    assert "- Lowercase letters: 13" in result
+
+
+def _reference_stats(text):
+    """The pure-Python definitions _text_stats uses below the kernel threshold."""
+    words = text.split()
+    sentences = sum(1 for s in text.split('.') if s.strip())
+    upper, lower, spaces = _reference_counts(text)
+    longest = max(words, key=len) if words else ""
+    return len(words), sentences, upper, lower, spaces, longest
+
+
+@pytest.mark.parametrize("extra", [0, 1, 4097])
+def test_text_stats_large_input_uses_compiled_kernel(extra):
+    pytest.importorskip("numba")
+    assert ta.analyze_bytes is not None
+    text = _random_ascii(ta._KERNEL_MIN_LENGTH + extra, extra)
+    stats = ta._text_stats(text)
+    assert tuple(int(n) for n in stats[:5]) + (stats[5],) == _reference_stats(text)
+
+
+def test_text_analyzer_large_ascii_input():
+    pytest.importorskip("numba")
+    text = "Hello World. " * (ta._KERNEL_MIN_LENGTH // 13 + 1)
+    result = ta.text_analyzer(text)
+    assert "Analysis error" not in result
+    assert f"- Word count: {2 * (ta._KERNEL_MIN_LENGTH // 13 + 1)}" in result
@@ -0,0 +1,118 @@
+import numba
+import numpy as np
+
+# SWAR constants - every byte lane holds the same value. All arithmetic stays in uint64
+# (mixing in signed ints would make Numba promote to float64).
+_ONES = np.uint64(0x0101010101010101)
+_LOW7 = np.uint64(0x7F7F7F7F7F7F7F7F)
+_HIGHS = np.uint64(0x8080808080808080)
+_SPACES = np.uint64(0x2020202020202020)
+# For ASCII bytes (< 0x80) adding these sets a lane's high bit exactly when c >= 'A', c >= '[',
+# c >= 'a' and c >= '{' respectively, and never carries into the next lane
+_FROM_UPPER_A = np.uint64(0x3F3F3F3F3F3F3F3F)
+_PAST_UPPER_Z = np.uint64(0x2525252525252525)
+_FROM_LOWER_A = np.uint64(0x1F1F1F1F1F1F1F1F)
+_PAST_LOWER_Z = np.uint64(0x0505050505050505)
+_SHIFT_7 = np.uint64(7)
+_SHIFT_56 = np.uint64(56)
+
+# Callers pass np.frombuffer views of bytes objects, which are read-only - an eager
+# signature over a mutable uint8[::1] would reject them
+_READONLY_BYTES = numba.types.Array(numba.types.uint8, 1, 'C', readonly=True)
+
+@numba.njit(inline='always')
+def _lane_count(mask):
+    """Count the lanes of a mask whose bytes are each 0x80 or 0."""
+    return ((mask >> _SHIFT_7) * _ONES) >> _SHIFT_56
+
+@numba.njit(numba.types.UniTuple(numba.int64, 3)(_READONLY_BYTES), cache=True, boundscheck=False)
+def count_classes(buf):
+    """
+    Return (uppercase, lowercase, spaces) for ASCII text, classifying 8 bytes per step
+    with SWAR arithmetic on uint64 words and finishing the tail byte by byte.
+    """
+    upper = np.uint64(0)
+    lower = np.uint64(0)
+    spaces = np.uint64(0)
+
+    n = buf.shape[0]
+    end = n - n % 8
+    for i in range(0, end, 8):
+        v = np.uint64(0)
+        for k in range(8):
+            v |= np.uint64(buf[i + k]) << np.uint64(8 * k)
+
+        # Zero-byte test on v ^ '    ', exact per lane (no borrow between lanes)
+        x = v ^ _SPACES
+        spaces += _lane_count(~(((x & _LOW7) + _LOW7) | x | _LOW7))
+        upper += _lane_count((v + _FROM_UPPER_A) & ~(v + _PAST_UPPER_Z) & _HIGHS)
+        lower += _lane_count((v + _FROM_LOWER_A) & ~(v + _PAST_LOWER_Z) & _HIGHS)
+
+    for i in range(end, n):
+        c = buf[i]
+        if 65 <= c <= 90:
+            upper += np.uint64(1)
+        elif 97 <= c <= 122:
+            lower += np.uint64(1)
+        elif c == 32:
+            spaces += np.uint64(1)
+
+    return np.int64(upper), np.int64(lower), np.int64(spaces)
+
+# Compiled eagerly from the explicit signature (and cached on disk), so the first
+# text_analyzer call doesn't pay for JIT compilation
+@numba.njit(numba.types.UniTuple(numba.int64, 7)(_READONLY_BYTES), cache=True, boundscheck=False)
+def analyze_bytes(buf):
+    """
+    Scan ASCII text once and return (uppercase, lowercase, spaces, words, sentences,
+    longest_word_start, longest_word_length).
+
+    Matches text_analyzer's pure-Python definitions: words are runs of non-whitespace
+    (str.split() whitespace: \\t-\\r, \\x1c-\\x1f and space), and a sentence is a
+    '.'-separated segment containing at least one non-whitespace character.
+    """
+    upper = 0
+    lower = 0
+    spaces = 0
+    words = 0
+    sentences = 0
+    best_start = 0
+    best_length = 0
+    run_start = -1
+    segment_has_text = False
+
+    n = buf.shape[0]
+    for i in range(n):
+        c = buf[i]
+        if 65 <= c <= 90:
+            upper += 1
+        elif 97 <= c <= 122:
+            lower += 1
+
+        if c == 32 or 9 <= c <= 13 or 28 <= c <= 31:
+            if c == 32:
+                spaces += 1
+            # End of a word - keep the first longest one, like max(words, key=len)
+            if run_start >= 0:
+                if i - run_start > best_length:
+                    best_start = run_start
+                    best_length = i - run_start
+                run_start = -1
+        else:
+            if run_start < 0:
+                run_start = i
+                words += 1
+            if c == 46:
+                if segment_has_text:
+                    sentences += 1
+                segment_has_text = False
+            else:
+                segment_has_text = True
+
+    if run_start >= 0 and n - run_start > best_length:
+        best_start = run_start
+        best_length = n - run_start
+    if segment_has_text:
+        sentences += 1
+
+    return upper, lower, spaces, words, sentences, best_start, best_length
@@ -1,63 +1,194 @@
+import asyncio
+import diskcache
+import hashlib
+import httpx
+import logging
+import os
 import requests
 
-def _search_with_serpapi(query: str, api_key: str, max_retries: int = 3) -> str:
-    """Search using SerpAPI with multiple query formulations if needed."""
-    
-    # Generate different query variations
-    query_variations = [
+log = logging.getLogger(__name__)
+
+SERPAPI_BASE_URL = "https://serpapi.com"
+SERPAPI_URL = f"{SERPAPI_BASE_URL}/search"
+
+# Successful results are cached on disk per query string, since every call costs an API credit
+_CACHE = diskcache.Cache(os.getenv('SERP_CACHE_DIR', '/tmp/serp_cache'))
+_CACHE_TTL = int(os.getenv('SERP_CACHE_TTL', 86400))
+
+def _cache_key(search_query: str) -> str:
+    # Entries are (text, confidence) tuples; the prefix keeps older plain-text entries from matching
+    return "result:" + hashlib.sha256(search_query.strip().lower().encode('utf-8')).hexdigest()
+
+# Shared session for the synchronous path: keeps connections alive across searches, with
+# enough pooled connections for verify_result's parallel worker threads
+_SESSION = requests.Session()
+_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# Shared async client: keeps connections to serpapi.com pooled (multiplexed over HTTP/2)
+_async_client = None
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Return the process-wide async HTTP client, creating it on first use."""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            base_url=SERPAPI_BASE_URL,
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=32)
+        )
+    return _async_client
+
+async def aclose_async_client():
+    """Close the shared async HTTP client (call on application shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+def _query_variations(query: str) -> list:
+    """Generate different formulations of the query to fall back on."""
+    # dict.fromkeys drops duplicates (e.g. the "power" rewrite of a query without "power")
+    # while keeping the order, so no request is spent twice on the same string
+    return list(dict.fromkeys([
         query,
         f"{query} definition",
         f"what is {query}",
         f"{query} explained",
         query.replace("power of", "thrust").replace("power", "specifications")
-    ]
+    ]))
+
+def _serpapi_params(search_query: str, api_key: str) -> dict:
+    return {
+        'q': search_query,
+        'api_key': api_key,
+        'engine': 'google',
+        'num': 3
+    }
+
+# Confidence of each kind of SerpAPI result; a direct answer ends the search immediately
+DIRECT_ANSWER = 3
+FACT = 2
+SNIPPETS = 1
+
+def _extract_best(data: dict):
+    """Return the most useful text from a SerpAPI response and its confidence, or None."""
+    # Check for answer box first (direct answers)
+    if 'answer_box' in data:
+        answer_box = data['answer_box']
+        if 'answer' in answer_box:
+            return f"Direct answer: {answer_box['answer']}", DIRECT_ANSWER
+        elif 'snippet' in answer_box:
+            return f"Answer: {answer_box['snippet']}", FACT
+    
+    # Check for knowledge graph (facts about entities)
+    if 'knowledge_graph' in data:
+        kg = data['knowledge_graph']
+        if 'description' in kg:
+            return f"Info: {kg['description']}", FACT
+    
+    # Get organic search results
+    if 'organic_results' in data and len(data['organic_results']) > 0:
+        results = []
+        for result in data['organic_results'][:2]:
+            if 'snippet' in result and len(result['snippet'].strip()) > 20:
+                results.append(f"• {result['snippet']}")
+        
+        if results:
+            return "Search results:\n" + "\n".join(results), SNIPPETS
     
-    for attempt, search_query in enumerate(query_variations[:max_retries]):
+    return None
+
+def _better(best, found):
+    """Return whichever of two (text, confidence) results is more confident."""
+    if found is not None and (best is None or found[1] > best[1]):
+        return found
+    return best
+
+def _search_with_serpapi(query: str, api_key: str, max_retries: int = 3) -> str:
+    """
+    Search using SerpAPI, trying further query formulations only while none has returned
+    a usable result - each variation costs a SerpAPI credit.
+    """
+    best = None
+    for attempt, search_query in enumerate(_query_variations(query)[:max_retries]):
         try:
-            print(f"🔍 Searching: '{search_query}' (attempt {attempt + 1})")
-            
-            url = "https://serpapi.com/search"
-            params = {
-                'q': search_query,
-                'api_key': api_key,
-                'engine': 'google',
-                'num': 3
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            # Check for answer box first (direct answers)
-            if 'answer_box' in data:
-                answer_box = data['answer_box']
-                if 'answer' in answer_box:
-                    return f"Direct answer: {answer_box['answer']}"
-                elif 'snippet' in answer_box:
-                    return f"Answer: {answer_box['snippet']}"
+            found = _CACHE.get(_cache_key(search_query))
+            if found:
+                log.debug("Cached: '%s'", search_query)
+            else:
+                log.debug("Searching: '%s' (attempt %d)", search_query, attempt + 1)
+                response = _SESSION.get(SERPAPI_URL, params=_serpapi_params(search_query, api_key), timeout=10)
+                found = _extract_best(response.json())
+                if found is None:
+                    log.debug("No good results for '%s', trying different approach...", search_query)
+                else:
+                    _CACHE.set(_cache_key(search_query), found, expire=_CACHE_TTL)
             
-            # Check for knowledge graph (facts about entities)
-            if 'knowledge_graph' in data:
-                kg = data['knowledge_graph']
-                if 'description' in kg:
-                    return f"Info: {kg['description']}"
-            
-            # Get organic search results
-            if 'organic_results' in data and len(data['organic_results']) > 0:
-                results = []
-                for result in data['organic_results'][:2]:
-                    if 'snippet' in result and len(result['snippet'].strip()) > 20:
-                        results.append(f"• {result['snippet']}")
-                
-                if results:
-                    return "Search results:\n" + "\n".join(results)
-            
-            # If this attempt didn't yield good results, try next variation
-            print(f"   No good results for '{search_query}', trying different approach...")
+            # Any usable result (snippets, a fact or a direct answer) ends the search, as
+            # another variation would spend a credit for at best a slightly better result
+            best = _better(best, found)
+            if best is not None:
+                break
             
         except Exception as e:
-            print(f"   Error with '{search_query}': {e}")
+            log.warning("Error with '%s': %s", search_query, e)
             continue
     
-    # If all SerpAPI attempts failed, return empty none
-    print("🔄 SerpAPI didn't find good results, returning empty string")
+    if best is None:
+        log.debug("SerpAPI didn't find good results")
+        return None
+    return best[0]
+
+async def _fetch_serpapi(client: httpx.AsyncClient, search_query: str, api_key: str):
+    """Run one SerpAPI query and return its (text, confidence) result, or None."""
+    try:
+        response = await client.get("/search", params=_serpapi_params(search_query, api_key))
+        found = _extract_best(response.json())
+        if found is None:
+            log.debug("No good results for '%s'", search_query)
+        else:
+            _CACHE.set(_cache_key(search_query), found, expire=_CACHE_TTL)
+        return found
+    except httpx.TimeoutException:
+        log.warning("Timed out on '%s'", search_query)
+    except Exception as e:
+        log.warning("Error with '%s': %s", search_query, e)
     return None
+
+async def _asearch_with_serpapi(query: str, api_key: str, max_retries: int = 3) -> str:
+    """
+    Async search that sends all query formulations at once and returns the most confident
+    result, cancelling the outstanding requests as soon as a direct answer arrives.
+    """
+    client = _get_async_client()
+    best = None
+    pending = []
+    
+    # Cached variations answer without spending a request
+    for search_query in _query_variations(query)[:max_retries]:
+        cached = _CACHE.get(_cache_key(search_query))
+        if cached:
+            log.debug("Cached: '%s'", search_query)
+            best = _better(best, cached)
+        else:
+            pending.append(search_query)
+    if best and best[1] >= DIRECT_ANSWER:
+        return best[0]
+    
+    log.debug("Searching %d variations of '%s' concurrently", len(pending), query)
+    tasks = [asyncio.create_task(_fetch_serpapi(client, search_query, api_key)) for search_query in pending]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            best = _better(best, await next_done)
+            if best and best[1] >= DIRECT_ANSWER:
+                break
+    finally:
+        # The remaining variations are no longer needed
+        for task in tasks:
+            task.cancel()
+    
+    if best is None:
+        log.debug("SerpAPI didn't find good results")
+        return None
+    return best[0]
@@ -1,26 +1,72 @@
+try:
+    import numpy as np
+except ImportError:  # Optional - the bytes.translate path below is used instead
+    np = None
+
+try:
+    from ._analyzer_kernel import analyze_bytes, count_classes
+except ImportError:  # Optional - needs numba
+    analyze_bytes = count_classes = None
+
+# Inputs at least this long (and ASCII) go through the compiled single-pass kernel
+_KERNEL_MIN_LENGTH = 64 * 1024
+
+# Every byte except the ASCII upper/lowercase letters, for counting with bytes.translate
+_NOT_UPPER = bytes(b for b in range(256) if not 65 <= b <= 90)
+_NOT_LOWER = bytes(b for b in range(256) if not 97 <= b <= 122)
+
+def _count_chars(text: str) -> tuple:
+    """Return the number of uppercase letters, lowercase letters and spaces in the text."""
+    if text.isascii():
+        data = text.encode('ascii')
+        if count_classes is not None:
+            # Compiled SWAR counter: classifies 8 bytes per step in one pass
+            return count_classes(np.frombuffer(data, dtype=np.uint8))
+        if np is not None:
+            # Vectorized comparisons over a uint8 view of the bytes - no Python-level loop
+            buf = np.frombuffer(data, dtype=np.uint8)
+            upper = np.count_nonzero((buf >= 65) & (buf <= 90))
+            lower = np.count_nonzero((buf >= 97) & (buf <= 122))
+            spaces = np.count_nonzero(buf == 0x20)
+            return int(upper), int(lower), int(spaces)
+        # Deleting every other byte counts the letters in one C-level pass
+        return len(data.translate(None, _NOT_UPPER)), len(data.translate(None, _NOT_LOWER)), data.count(b' ')
+    # Non-ASCII needs str.isupper/islower - classify each character once instead of twice
+    upper = lower = 0
+    for c in text:
+        if c.isupper():
+            upper += 1
+        elif c.islower():
+            lower += 1
+    return upper, lower, text.count(' ')
+
+def _text_stats(text: str) -> tuple:
+    """Return the word, sentence, uppercase, lowercase and space counts and the longest word."""
+    if analyze_bytes is not None and len(text) >= _KERNEL_MIN_LENGTH and text.isascii():
+        # One compiled pass computes every counter for large inputs
+        buf = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+        upper, lower, spaces, words, sentences, start, length = analyze_bytes(buf)
+        return words, sentences, upper, lower, spaces, text[start:start + length]
+    
+    words = text.split()
+    sentence_count = sum(1 for s in text.split('.') if s.strip())
+    uppercase_count, lowercase_count, space_count = _count_chars(text)
+    longest_word = max(words, key=len) if words else ""
+    return len(words), sentence_count, uppercase_count, lowercase_count, space_count, longest_word
+
 def text_analyzer(text: str) -> str:
     """Analyzes text and provides statistics and insights."""
     try:
         # Basic text analysis
-        words = text.split()
-        sentences = text.split('.')
-        
-        # Count different elements
-        word_count = len(words)
-        sentence_count = len([s for s in sentences if s.strip()])
+        word_count, sentence_count, uppercase_count, lowercase_count, space_count, longest_word = _text_stats(text)
         char_count = len(text)
-        char_count_no_spaces = len(text.replace(' ', ''))
-        
-        # Find longest word
-        longest_word = max(words, key=len) if words else ""
-        
-        # Count uppercase and lowercase letters
-        uppercase_count = sum(1 for c in text if c.isupper())
-        lowercase_count = sum(1 for c in text if c.islower())
+        char_count_no_spaces = char_count - space_count
         
         # Basic readability (average words per sentence)
         avg_words_per_sentence = round(word_count / sentence_count, 1) if sentence_count > 0 else 0
         
+        head = text if len(text) <= 50 else text[:50] + "..."
+        
         analysis = f"""Text Analysis Results:
 - Word count: {word_count}
 - Sentence count: {sentence_count}
@@ -29,7 +75,7 @@ def text_analyzer(text: str) -> str:
 - Uppercase letters: {uppercase_count}
 - Lowercase letters: {lowercase_count}
 - Average words per sentence: {avg_words_per_sentence}
-- Text starts with: "{text[:50]}{'...' if len(text) > 50 else ''}"
+- Text starts with: "{head}"
 """
         
         return analysis
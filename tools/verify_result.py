@@ -1,28 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
 from tools.web_search import web_search
+import os
 import re
 
+# Common verification words stripped from descriptions before searching
+_STOPWORDS_RE = re.compile(r'\b(?:verify|check|validate|result|seems|appears|power|of|the|in|terms|based|on|its|output)\b')
+# Numbers (with thousands separators and decimals) quoted in search results
+_NUM_RE = re.compile(r'[\d,]+\.?\d*')
+
+# Topic keywords that pick the query wording (plain substring matches in one scan each)
+_TECH_RE = re.compile(r'engine|power|horsepower|thrust|conversion')
+_OFFICIAL_RE = re.compile(r'ge90|boeing|aircraft|engine')
+_METHOD_RE = re.compile(r'calculation|formula|conversion')
+
+# Report separators
+_SEP_EQ = "=" * 50
+_SEP_DASH = "-" * 30
+
 def verify_result(description: str) -> str:
     """Enhanced verification tool that checks results across multiple sources."""
+    # Every search would come back as "No SerpAPI key found", so there is nothing to compare
+    if not os.getenv('SERPAPI_KEY'):
+        return "Verification unavailable: no SERPAPI_KEY configured."
+    
     try:
         # Generate multiple search queries with different approaches
-        queries = _generate_verification_queries(description)
+        # Repeated queries are dropped - they would only spend extra searches
+        queries = list(dict.fromkeys(_generate_verification_queries(description)))
         
-        # Perform searches across multiple sources
-        search_results = []
-        for i, query in enumerate(queries, 1):
-            try:
-                result = web_search(query)
-                search_results.append({
-                    'query': query,
-                    'result': result,
-                    'source_num': i
-                })
-            except Exception as e:
-                search_results.append({
-                    'query': query,
-                    'result': f"Search failed: {str(e)}",
-                    'source_num': i
-                })
+        # Perform searches across multiple sources in parallel - each one waits on the network
+        with ThreadPoolExecutor(max_workers=max(len(queries), 1)) as executor:
+            search_results = list(executor.map(_search_source, range(1, len(queries) + 1), queries))
         
         # Analyze and compare results
         verification_report = _analyze_verification_results(search_results, description)
@@ -32,43 +40,57 @@ def verify_result(description: str) -> str:
     except Exception as e:
         return f"Multi-source verification failed: {str(e)}. Consider manually double-checking your result using alternative methods or sources."
 
-def _generate_verification_queries(description: str) -> list:
-    """Generate multiple verification queries with different approaches."""
+def _clip(text: str, limit: int = 200) -> str:
+    """Shorten text to `limit` characters plus an ellipsis, slicing only when it is longer."""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+def _search_source(source_num: int, query: str) -> dict:
+    """Run one verification search, recording a failure instead of raising."""
+    try:
+        result = web_search(query)
+    except Exception as e:
+        result = f"Search failed: {str(e)}"
+    return {
+        'query': query,
+        'result': result,
+        'source_num': source_num
+    }
+
+def _generate_verification_queries(description: str):
+    """Generate multiple verification queries with different approaches (four at most)."""
     # Extract key terms from the description
-    key_terms = _extract_key_terms(description)
-    
-    queries = []
+    # Fall back to the full description when nothing but stopwords is left
+    key_terms = _extract_key_terms(description) or description
+    description_lower = description.lower()
     
     # Query 1: Direct verification
-    queries.append(f"verify check validate {description}")
+    yield f"verify check validate {description}"
     
     # Query 2: Technical specifications
-    if any(term in description.lower() for term in ['engine', 'power', 'horsepower', 'thrust', 'conversion']):
-        queries.append(f"{key_terms} technical specifications datasheet")
+    if _TECH_RE.search(description_lower):
+        yield f"{key_terms} technical specifications datasheet"
     else:
-        queries.append(f"{key_terms} technical specifications")
+        yield f"{key_terms} technical specifications"
     
     # Query 3: Multiple sources comparison
-    queries.append(f"{key_terms} multiple sources comparison")
+    yield f"{key_terms} multiple sources comparison"
     
     # Query 4: Official/authoritative source
-    if any(term in description.lower() for term in ['ge90', 'boeing', 'aircraft', 'engine']):
-        queries.append(f"{key_terms} official manufacturer specifications")
-    elif any(term in description.lower() for term in ['calculation', 'formula', 'conversion']):
-        queries.append(f"{key_terms} standard formula method")
+    if _OFFICIAL_RE.search(description_lower):
+        yield f"{key_terms} official manufacturer specifications"
+    elif _METHOD_RE.search(description_lower):
+        yield f"{key_terms} standard formula method"
     else:
-        queries.append(f"{key_terms} authoritative source")
-    
-    return queries[:4]  # Limit to 4 queries to avoid overwhelming
+        yield f"{key_terms} authoritative source"
 
 def _extract_key_terms(description: str) -> str:
     """Extract key terms from the description for targeted searches."""
     # Remove common verification words
-    cleaned = re.sub(r'\b(verify|check|validate|result|seems|appears|power|of|the|in|terms|based|on|its|output)\b', '', description.lower())
+    cleaned = _STOPWORDS_RE.sub('', description.lower())
     
     # Extract meaningful terms
-    words = cleaned.split()
-    key_words = [word.strip('.,()[]') for word in words if len(word.strip('.,()[]')) > 2]
+    stripped = (word.strip('.,()[]') for word in cleaned.split())
+    key_words = [word for word in stripped if len(word) > 2]
     
     return ' '.join(key_words[:5])  # Limit to 5 key terms
 
@@ -76,27 +98,28 @@ def _analyze_verification_results(search_results: list, original_description: st
     """Analyze and compare verification results from multiple sources."""
     report = []
     report.append("🔍 MULTI-SOURCE VERIFICATION REPORT")
-    report.append("=" * 50)
+    report.append(_SEP_EQ)
     report.append(f"Original Query: {original_description}")
     report.append("")
     
     # Present results from each source
     valid_results = []
+    valid_numbers = []  # Numbers found in each valid result, scanned once
     
     for result in search_results:
         report.append(f"📊 Source {result['source_num']}: {result['query']}")
-        report.append("-" * 30)
+        report.append(_SEP_DASH)
         
         if "Search failed" not in result['result']:
             # Extract numerical values if present
-            numbers = re.findall(r'[\d,]+\.?\d*', result['result'])
+            numbers = _NUM_RE.findall(result['result'])
             if numbers:
                 report.append(f"Key numbers found: {', '.join(numbers[:3])}")
             
             # Show relevant excerpt
-            excerpt = result['result'][:200] + "..." if len(result['result']) > 200 else result['result']
-            report.append(f"Excerpt: {excerpt}")
+            report.append(f"Excerpt: {_clip(result['result'])}")
             valid_results.append(result['result'])
+            valid_numbers.append(numbers)
         else:
             report.append(f"❌ {result['result']}")
         
@@ -104,27 +127,26 @@ def _analyze_verification_results(search_results: list, original_description: st
     
     # Analysis and consensus
     report.append("🎯 VERIFICATION ANALYSIS:")
-    report.append("-" * 30)
+    report.append(_SEP_DASH)
     
-    if len(valid_results) >= 2:
+    valid_count = len(valid_results)
+    if valid_count >= 2:
         # Look for consensus patterns
-        all_numbers = []
-        for result in valid_results:
-            numbers = re.findall(r'[\d,]+\.?\d*', result)
-            all_numbers.extend(numbers)
+        unique_numbers = set()
+        for numbers in valid_numbers:
+            unique_numbers.update(numbers)
         
-        if all_numbers:
-            report.append(f"Numbers found across sources: {', '.join(set(all_numbers))}")
+        if unique_numbers:
+            report.append(f"Numbers found across sources: {', '.join(unique_numbers)}")
             
             # Check for consistency
-            unique_numbers = set(all_numbers)
             if len(unique_numbers) <= 3:
                 report.append("✅ Results show some consistency across sources")
             else:
                 report.append("⚠️  Results show significant variation - this is normal for complex specifications")
         
-        report.append(f"✅ Successfully verified with {len(valid_results)} sources")
-    elif len(valid_results) == 1:
+        report.append(f"✅ Successfully verified with {valid_count} sources")
+    elif valid_count == 1:
         report.append("⚠️  Only one source provided results - consider additional verification")
     else:
         report.append("❌ No sources provided valid results - manual verification strongly recommended")
@@ -1,5 +1,5 @@
 import os
-from .search_with_serp_api import _search_with_serpapi
+from .search_with_serp_api import _search_with_serpapi, _asearch_with_serpapi
 
 def web_search(query: str) -> str:
     """A web search tool that uses SerpAPI with retry logic, or falls back to knowledge base."""
@@ -10,3 +10,11 @@ def web_search(query: str) -> str:
     else:
         return "No SerpAPI key found"
 
+async def aweb_search(query: str) -> str:
+    """Async version of web_search() that tries the query variations concurrently."""
+    serpapi_key = os.getenv('SERPAPI_KEY')
+    
+    if serpapi_key:
+        return await _asearch_with_serpapi(query, serpapi_key)
+    else:
+        return "No SerpAPI key found"
@@ -1,4 +1,4 @@
-import ast  # Import ast to safely evaluate string representations of Python objects
+from collections import OrderedDict
 from typing import List, Dict
 import uuid
 from schemas.chat_history import ChatMessage
@@ -7,11 +7,17 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 from utils.email import send_email  # Assume you have a utility to send emails
 import asyncio
-from sqlalchemy import Column, String, Boolean, DateTime
+import functools
+import hashlib
+import logging
+import time
+from sqlalchemy import Column, String, Boolean, DateTime, inspect, select
 from sqlalchemy.ext.declarative import declarative_base
 from models.chat_model import chat  # Chat model used for AI response streaming
 from langchain.schema import HumanMessage  # Message schema for LangChain
 
+log = logging.getLogger(__name__)
+
 Base = declarative_base()
 
 
@@ -42,89 +48,55 @@ def extract_chunk_texts(results) -> str:
     - If results is a dict with a "data" key, it extracts the list from there.
     - If the result elements (or the entire results) are nested lists,
       it iterates through the inner lists.
-    - It safely parses string representations if necessary.
 
     Returns:
     - A single string of all extracted 'chunk_text' values separated by newlines.
     """
-    print("Extracting chunk texts from search results")
-    
-    chunk_texts = []  # List to hold the extracted texts
-    document_ids = []  # List to hold the extracted document IDs
     # If results is a dictionary, extract its "data" key; otherwise assume it's a list.
     if isinstance(results, dict):
         results_data = results.get("data", [])
     else:
         results_data = results
 
-    print(f"Processing {len(results_data)} result items")
-    
-    # Iterate over each element in the results. In your case, each element might itself be a list.
-    for result in results_data:
-        # If the result is a list, iterate through its items.
-        if isinstance(result, list):
-            for sub_result in result:
-                # Process each sub_result as we would for a regular result.
-                process_result_item(sub_result, chunk_texts, document_ids)
-        else:
-            # Process the result directly.
-            process_result_item(result, chunk_texts, document_ids)
+    log.debug("Processing %d result items", len(results_data))
 
-    print(f"Extracted {len(chunk_texts)} chunk texts from search results")
+    chunk_texts = list(_iter_chunk_texts(results_data))
+
+    log.debug("Extracted %d chunk texts from search results", len(chunk_texts))
     return "\n".join(chunk_texts)
 
 
-def process_result_item(result, chunk_texts_list, document_ids_list):
+def _iter_chunk_texts(results_data):
     """
-    Helper function to process an individual result item.
+    Yields the non-empty 'chunk_text' of every result item, in order.
 
-    It handles:
-    - String results: tries to parse them.
-    - Dict results: extracts 'chunk_text' from the 'entity' key.
-    - Custom objects with an 'entity' attribute.
+    Items may be dicts or hit objects with an 'entity' (a dict), or lists of them
+    (one list per query vector). Milvus returns these as Python objects already, so
+    nothing is parsed from strings.
     """
-    # If the result is a string, parse it.
-    if isinstance(result, str):
-        try:
-            result = ast.literal_eval(result)
-            print("Parsed string result into Python object")
-        except Exception as e:
-            print(f"Error parsing result string: {str(e)}")
-            return
-
-    # If result is a dict, try to extract 'chunk_text' from 'entity'.
-    if isinstance(result, dict):
-        if "entity" in result:
-            entity = result["entity"]
+    for result in results_data:
+        # Each element might itself be a list - walk its items in place
+        items = result if isinstance(result, list) else (result,)
+        for item in items:
+            if isinstance(item, dict):
+                entity = item.get("entity")
+            else:
+                entity = getattr(item, "entity", None)
+
             if isinstance(entity, dict):
                 chunk_text = entity.get("chunk_text")
-                document_id = entity.get("document_id")
                 if chunk_text:
-                    chunk_texts_list.append(chunk_text)
-                    document_ids_list.append(document_id)
-                    print(f"Extracted chunk text from document ID: {document_id}")
-                else:
-                    print("'chunk_text' not found in entity dict")
-            else:
-                print(f"Unexpected type for 'entity': {type(entity)}")
-        else:
-            print("'entity' key not found in result dict")
-    # If result isn't a dict but has an entity attribute, try that.
-    elif hasattr(result, "entity"):
-        entity = getattr(result, "entity")
-        if isinstance(entity, dict):
-            chunk_text = entity.get("chunk_text")
-            document_id = entity.get("document_id")
-            if chunk_text:
-                chunk_texts_list.append(chunk_text)
-                document_ids_list.append(document_id)
-                print(f"Extracted chunk text from document ID: {document_id}")
+                    yield chunk_text
             else:
-                print("'chunk_text' field is missing in the entity attribute")
-        else:
-            print(f"'entity' attribute is not a dict but {type(entity)}")
-    else:
-        print(f"Unexpected result type in sub-item: {type(result)}")
+                log.warning("Unexpected search result item: %s", type(item))
+
+
+@functools.lru_cache(maxsize=256)
+def _static_prefix(pluggedIn_prompt: str, pluggr_prompt: str) -> str:
+    """
+    Joins the per-bot prompts, which rarely change, once per bot instead of every turn.
+    """
+    return f"{pluggedIn_prompt}\n{pluggr_prompt}\n"
 
 
 def generate_augmented_prompt(
@@ -146,7 +118,7 @@ def generate_augmented_prompt(
     Returns:
     - A string containing the augmented prompt with context.
     """
-    print(f"Generating augmented prompt for query: {user_query[:50]}...")
+    log.debug("Generating augmented prompt for query: %.50s...", user_query)
     
     # Handle case when chat_history is None or empty
     chat_history_section = (
@@ -161,41 +133,90 @@ def generate_augmented_prompt(
         f"\nUser question, always respond to this question:\n{user_query}\n"
     )
 
-    augmented_prompt = (
-        f"{user_query_section}"
-        f"{pluggedIn_prompt}\n"
-        f"{pluggr_prompt}\n"
-        f"{relevant_info}\n"
-        f"{wait_for_instruction_section}\n"
-        f"{chat_history_section}\n"
-    )
+    # Ordered from most to least stable, so consecutive turns share the longest possible
+    # prefix and hit the LLM provider's prompt cache: bot prompts, then the history
+    # (which only grows), then the retrieved context and finally the new question
+    augmented_prompt = "".join((
+        _static_prefix(pluggedIn_prompt, pluggr_prompt),
+        f"{chat_history_section}\n",
+        f"{relevant_info}\n",
+        f"{wait_for_instruction_section}\n",
+        user_query_section,
+    ))
     
-    print(f"Augmented prompt generated with {len(relevant_info)} characters of relevant info")
+    log.debug("Augmented prompt generated with %d characters of relevant info", len(relevant_info))
     return augmented_prompt
 
 
-conversation_cache = {}
+# chat_id -> {"messages": [...], "last_message_time": ...}, least recently active first.
+# Bounded so abandoned chats can't grow it forever; chats evicted here get no summary email.
+_MAX_CACHED_CHATS = 1024
+conversation_cache = OrderedDict()
+
+
+def _touch_chat(chat_id: str):
+    """
+    Marks a cached chat as the most recently active, evicting the oldest beyond the limit.
+    """
+    conversation_cache.move_to_end(chat_id)
+    while len(conversation_cache) > _MAX_CACHED_CHATS:
+        evicted_id, _ = conversation_cache.popitem(last=False)
+        log.warning("Evicted chat_id %s from the conversation cache", evicted_id)
+
+# Message fields, in dict order. admin_id and persona are newer and may not be mapped
+# yet, so which columns exist is resolved once here rather than per row.
+_MESSAGE_FIELDS = ("id", "chat_id", "role", "content", "pluggr_id", "admin_id", "persona", "timestamp")
+_MAPPED_COLUMNS = set(inspect(ChatMessage).columns.keys())
+_MESSAGE_COLUMNS = [getattr(ChatMessage, name) for name in _MESSAGE_FIELDS if name in _MAPPED_COLUMNS]
+_MISSING_FIELDS = {name: None for name in _MESSAGE_FIELDS if name not in _MAPPED_COLUMNS}
+
+
+def _select_messages(db: Session, *criteria) -> List[Dict]:
+    """
+    Loads matching messages, oldest first, as plain dicts.
+
+    Selects the columns directly instead of loading ORM objects, so no instances are
+    built or tracked by the session just to be copied into dicts.
+    """
+    rows = db.execute(
+        select(*_MESSAGE_COLUMNS)
+        .where(*criteria)
+        .order_by(ChatMessage.timestamp.asc())
+    ).mappings()
+    return [{**row, **_MISSING_FIELDS} for row in rows]
+
+
+def _load_messages(*criteria) -> List[Dict]:
+    """
+    Runs _select_messages in a session of its own. Blocks - call it via asyncio.to_thread.
+    """
+    # The context manager closes the session even if checking out a connection fails
+    with SessionLocal() as db:
+        return _select_messages(db, *criteria)
+
+
+def _query_chat_ids(pluggr_id: str) -> List[str]:
+    with SessionLocal() as db:
+        # Query all chat_ids for the given pluggr_id. Results are streamed from a server-side
+        # cursor and come back as plain strings - no Row tuples to unpack.
+        return list(db.scalars(
+            select(ChatMessage.chat_id)
+            .where(ChatMessage.pluggr_id == pluggr_id)
+            .distinct()
+            .execution_options(stream_results=True, yield_per=1000)
+        ))
+
 
 async def get_chat_ids(pluggr_id: str) -> List[str]:
     """
     Retrieves all chat_ids for a given pluggr_id from the database.
     """
-    db: Session = SessionLocal()
     try:
-        # Query all chat_ids for the given pluggr_id
-        chat_ids = (db.query(ChatMessage.chat_id)
-                   .filter(ChatMessage.pluggr_id == pluggr_id)
-                   .distinct()
-                   .all())
-
-        # Convert ORM objects to list of strings
-        return [chat_id[0] for chat_id in chat_ids]
+        # Database calls block, so they run in a worker thread to keep the event loop free
+        return await asyncio.to_thread(_query_chat_ids, pluggr_id)
     except Exception as e:
-        print(f"Error retrieving chat_ids: {str(e)}")
+        log.error("Error retrieving chat_ids: %s", e)
         raise
-    finally:
-        db.close()
-
 
 
 async def get_chat_history(chat_id: str, pluggr_id: str) -> List[Dict]:
@@ -203,70 +224,28 @@ async def get_chat_history(chat_id: str, pluggr_id: str) -> List[Dict]:
     Retrieves complete chat history by combining database records with cached messages.
     Returns a list of dictionaries with message data.
     """
-    print(f"Fetching chat history for chat_id: {chat_id}, pluggr_id: {pluggr_id}")
+    log.debug("Fetching chat history for chat_id: %s, pluggr_id: %s", chat_id, pluggr_id)
     
-    # Get messages from database
-    db: Session = SessionLocal()
     try:
-        messages = (
-            db.query(ChatMessage)
-            .filter(ChatMessage.chat_id == chat_id, ChatMessage.pluggr_id == pluggr_id)
-            .order_by(ChatMessage.timestamp.asc())
-            .all()
+        # Get messages from database, in a worker thread so the event loop isn't blocked
+        db_message_dicts = await asyncio.to_thread(
+            _load_messages, ChatMessage.chat_id == chat_id, ChatMessage.pluggr_id == pluggr_id
         )
 
-        print(f"Found {len(messages)} messages in database")
-
-        # Convert ORM objects to dictionaries to avoid detached instance errors
-        db_message_dicts = []
-        for msg in messages:
-            # Create a base message dictionary with fields that definitely exist
-            message_dict = {
-                "id": msg.id,
-                "chat_id": msg.chat_id,
-                "role": msg.role,
-                "content": msg.content,
-                "pluggr_id": msg.pluggr_id,
-                "admin_id": getattr(msg, 'admin_id', None),
-                "persona": getattr(msg, 'persona', None),
-                "timestamp": msg.timestamp,
-            }
-            
-            # Add admin_id and persona if they exist in the database schema
-            # This is a safe way to handle the case where the columns don't exist yet
-            try:
-                if hasattr(msg, 'admin_id'):
-                    message_dict["admin_id"] = msg.admin_id
-                else:
-                    message_dict["admin_id"] = None
-                    
-                if hasattr(msg, 'persona'):
-                    message_dict["persona"] = msg.persona
-                else:
-                    message_dict["persona"] = None
-            except Exception as e:
-                print(f"Error accessing new fields: {str(e)}")
-                message_dict["admin_id"] = None
-                message_dict["persona"] = None
-                
-            db_message_dicts.append(message_dict)
+        log.debug("Found %d messages in database", len(db_message_dicts))
 
         # Check if there are any cached messages that might not be in the database yet
         cached_messages = []
-        if (
-            chat_id in conversation_cache
-            and isinstance(conversation_cache[chat_id], dict)
-            and "messages" in conversation_cache[chat_id]
-        ):
+        if chat_id in conversation_cache:
             cached_messages = conversation_cache[chat_id]["messages"]
-            print(f"Found {len(cached_messages)} messages in cache")
+            log.debug("Found %d messages in cache", len(cached_messages))
 
             # Filter out cached messages that are already in the database
             db_message_ids = {msg["id"] for msg in db_message_dicts}
             new_cached_messages = [
                 msg for msg in cached_messages if msg["id"] not in db_message_ids
             ]
-            print(f"Found {len(new_cached_messages)} new messages in cache not yet in database")
+            log.debug("Found %d new messages in cache not yet in database", len(new_cached_messages))
 
             # Combine database messages with new cached messages
             combined_messages = db_message_dicts + new_cached_messages
@@ -276,17 +255,86 @@ async def get_chat_history(chat_id: str, pluggr_id: str) -> List[Dict]:
         # Update cache with the combined messages
         conversation_cache[chat_id] = {
             "messages": combined_messages,
-            "last_message_time": datetime.now(),
+            "last_message_time": time.monotonic(),
         }
+        _touch_chat(chat_id)
 
-        print(f"Returning combined history with {len(combined_messages)} messages for chat_id: {chat_id}")
+        log.debug("Returning combined history with %d messages for chat_id: %s", len(combined_messages), chat_id)
         return combined_messages
     except Exception as e:
-        print(f"Error retrieving chat history: {str(e)}")
+        log.error("Error retrieving chat history: %s", e)
         raise
-    finally:
-        db.close()  # Ensure database connection is closed
-        print("Database session closed")
+
+
+def _insert_messages(messages: List[ChatMessage]) -> bool:
+    """
+    Adds messages to the database in one transaction, logging (not raising) failures.
+    Returns whether the commit succeeded. Blocks.
+    """
+    try:
+        with SessionLocal() as db:
+            db.add_all(messages)
+            db.commit()
+        log.debug("Saved %d messages to database", len(messages))
+        return True
+    except Exception as e:
+        # Closing the session rolled back whatever the failed commit left open
+        log.error("Error saving %d messages to database: %s", len(messages), e)
+        return False
+
+
+# Messages waiting to be written. One writer task commits whatever has queued up in a
+# single transaction, so bursts of messages cost one round-trip instead of one each.
+_MESSAGE_BATCH_SIZE = 64
+_pending_messages = asyncio.Queue()
+_message_writer_task = None
+
+
+async def _message_writer():
+    """
+    Writes queued messages to the database in batches, forever.
+    """
+    while True:
+        batch = [await _pending_messages.get()]
+        while len(batch) < _MESSAGE_BATCH_SIZE and not _pending_messages.empty():
+            batch.append(_pending_messages.get_nowait())
+        try:
+            if not await asyncio.to_thread(_insert_messages, batch) and len(batch) > 1:
+                # Don't let one bad message take the rest of the batch down with it
+                for message in batch:
+                    await asyncio.to_thread(_insert_messages, [message])
+        finally:
+            for _ in batch:
+                _pending_messages.task_done()
+
+
+async def flush_pending_messages():
+    """
+    Waits until every queued message has been written. Call it before shutting down.
+    """
+    if _message_writer_task is not None:
+        await _pending_messages.join()
+
+
+# app.api.endpoints.chat imports this module, so its signal function is imported on first
+# use (not at import time) and kept here, rather than re-imported for every message
+_signal_chat_updated = None
+
+
+def _get_chat_update_signal():
+    """
+    Returns app.api.endpoints.chat.signal_chat_updated, or None if it can't be imported.
+    """
+    global _signal_chat_updated
+    if _signal_chat_updated is None:
+        try:
+            from app.api.endpoints.chat import signal_chat_updated
+        except ImportError:
+            # Handle the case where the function can't be imported (to avoid circular imports)
+            log.warning("Could not import signal_chat_updated function")
+            return None
+        _signal_chat_updated = signal_chat_updated
+    return _signal_chat_updated
 
 
 async def save_message(chat_id: str, role: str, content: str, pluggr_id: str, admin_id: str = None, persona: str = None):
@@ -301,7 +349,8 @@ async def save_message(chat_id: str, role: str, content: str, pluggr_id: str, ad
         admin_id (str, optional): The ID of the admin (only used when role is 'admin')
         persona (str, optional): Optional persona identifier for future functionality
     """
-    print(f"Saving {role} message for chat_id: {chat_id}, pluggr_id: {pluggr_id}")
+    global _message_writer_task
+    log.debug("Saving %s message for chat_id: %s, pluggr_id: %s", role, chat_id, pluggr_id)
     
     # Create new message with UUID as string to avoid type mismatch
     message_id = str(uuid.uuid4())  # Convert UUID to string
@@ -318,27 +367,14 @@ async def save_message(chat_id: str, role: str, content: str, pluggr_id: str, ad
         "timestamp": datetime.now(),  # Add import for datetime if needed
     }
 
-    # Ensure the chat_id is initialized as a dictionary in the cache
-    if chat_id not in conversation_cache:
-        conversation_cache[chat_id] = {
-            "messages": [],
-            "last_message_time": datetime.now(),
-        }
-    elif not isinstance(conversation_cache[chat_id], dict):
-        # If it's not a dictionary, convert it to one
-        conversation_cache[chat_id] = {
-            "messages": conversation_cache[chat_id]
-            if isinstance(conversation_cache[chat_id], list)
-            else [],
-            "last_message_time": datetime.now(),
-        }
-    elif "messages" not in conversation_cache[chat_id]:
-        conversation_cache[chat_id]["messages"] = []
+    # Entries are only ever created in this shape, so no type repair is needed. There is
+    # no await between the lookup and the append, so concurrent saves can't interleave here.
+    entry = conversation_cache.setdefault(chat_id, {"messages": []})
+    entry["messages"].append(message_dict)
+    entry["last_message_time"] = time.monotonic()
+    _touch_chat(chat_id)
 
-    conversation_cache[chat_id]["messages"].append(message_dict)
-    conversation_cache[chat_id]["last_message_time"] = datetime.now()
-
-    print(f"Added message to cache for chat_id {chat_id}. Cache now has {len(conversation_cache[chat_id]['messages'])} messages.")
+    log.debug("Added message to cache for chat_id %s. Cache now has %d messages.", chat_id, len(entry["messages"]))
 
     # Create the ORM object for database storage - only include fields that exist in the database
     try:
@@ -350,44 +386,39 @@ async def save_message(chat_id: str, role: str, content: str, pluggr_id: str, ad
             pluggr_id=pluggr_id
         )
         
-        # Save to database
-        db: Session = SessionLocal()
-        try:
-            db.add(message)
-            db.commit()
-            print(f"Saved message to database: id={message_id}, role={role}, chat_id={chat_id}")
-        except Exception as e:
-            print(f"Error saving message to database: {str(e)}")
-            db.rollback()
-        finally:
-            db.close()
-            print("Database session closed")
+        # Queue it for the background writer - the cache serves reads until it's committed
+        if _message_writer_task is None or _message_writer_task.done():
+            _message_writer_task = asyncio.create_task(_message_writer())
+        _pending_messages.put_nowait(message)
     except Exception as e:
-        print(f"Error creating message object: {str(e)}")
+        log.error("Error creating message object: %s", e)
         # Still keep the message in cache even if database save fails
 
-    # After successfully saving the message, import and call the signal function
-    try:
-        from app.api.endpoints.chat import signal_chat_updated
+    # After saving the message, call the signal function
+    signal_chat_updated = _get_chat_update_signal()
+    if signal_chat_updated is not None:
         signal_chat_updated(chat_id)
-    except ImportError:
-        # Handle the case where the function can't be imported (to avoid circular imports)
-        print("Could not import signal_chat_updated function")
-    
-    # Note: You might need to handle circular imports differently depending on your project structure
 
 
 def serialize_chat_history(chat_history):
     """
     Convert chat history with datetime objects to a JSON-serializable format.
     """
-    print(f"Serializing chat history with {len(chat_history)} messages")
+    log.debug("Serializing chat history with %d messages", len(chat_history))
     for message in chat_history:
         if "timestamp" in message and isinstance(message["timestamp"], datetime):
             message["timestamp"] = message["timestamp"].isoformat()
     return chat_history
 
 
+def _timestamp_sort_key(message):
+    """
+    Returns the message timestamp as an ISO string, so datetimes and strings compare.
+    """
+    timestamp = message.get("timestamp", "")
+    return timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp
+
+
 def format_chat_history_for_email(chat_history):
     """
     Format chat history into a human-readable format for email.
@@ -398,32 +429,30 @@ def format_chat_history_for_email(chat_history):
     Returns:
         str: Formatted chat history as a string
     """
-    print(f"Formatting chat history for email with {len(chat_history)} messages")
+    log.debug("Formatting chat history for email with %d messages", len(chat_history))
     
-    # Convert all timestamps to strings first to avoid datetime comparison issues
-    for message in chat_history:
-        if "timestamp" in message and isinstance(message["timestamp"], datetime):
-            message["timestamp_str"] = message["timestamp"].isoformat()
-
     # Sort messages by timestamp string to ensure correct order
-    sorted_history = sorted(
-        chat_history, key=lambda x: x.get("timestamp_str", x.get("timestamp", ""))
-    )
+    sorted_history = sorted(chat_history, key=_timestamp_sort_key)
     
     # Remove duplicate messages by tracking message content and role
     unique_messages = []
-    seen_messages = set()  # Set to track unique (role, content) combinations
+    seen_messages = set()  # Set to track digests of unique (role, content) combinations
     
     for message in sorted_history:
-        # Create a tuple of role and content to identify unique messages
-        message_key = (message.get("role", ""), message.get("content", ""))
+        # A fixed-size digest of role and content identifies the message, so the set
+        # doesn't keep every long reply alive or rehash it on each probe
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update((message.get("role") or "").encode())
+        digest.update(b"\x00")
+        digest.update((message.get("content") or "").encode())
+        message_key = digest.digest()
         
         # Only add the message if we haven't seen this combination before
         if message_key not in seen_messages:
             seen_messages.add(message_key)
             unique_messages.append(message)
 
-    print(f"Removed {len(sorted_history) - len(unique_messages)} duplicate messages")
+    log.debug("Removed %d duplicate messages", len(sorted_history) - len(unique_messages))
 
     # Format the chat history
     formatted_history = []
@@ -435,40 +464,36 @@ def format_chat_history_for_email(chat_history):
         # Extract timestamp
         timestamp = message.get("timestamp")
 
-        # Format the timestamp
+        # Parse string timestamps; only a trailing "Z" needs rewriting for fromisoformat
+        dt = None
         if isinstance(timestamp, datetime):
-            message_date = timestamp.strftime("%Y-%m-%d")
-            timestamp_str = timestamp.strftime("%H:%M:%S")
+            dt = timestamp
+        elif isinstance(timestamp, str):
+            try:
+                dt = datetime.fromisoformat(
+                    timestamp[:-1] + "+00:00" if timestamp.endswith("Z") else timestamp
+                )
+            except ValueError:
+                log.debug("Could not parse timestamp: %s", timestamp)
+
+        # Format the timestamp - one strftime call gives both the date and the time
+        if dt is not None:
+            message_date, timestamp_str = dt.strftime("%Y-%m-%d %H:%M:%S").split(" ")
 
             # Add date header if it's a new date
             if message_date != current_date:
                 current_date = message_date
                 formatted_history.append(f"\n[Date: {current_date}]\n")
         else:
-            # Handle string timestamps
-            try:
-                if isinstance(timestamp, str):
-                    dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-                    message_date = dt.strftime("%Y-%m-%d")
-                    timestamp_str = dt.strftime("%H:%M:%S")
-
-                    # Add date header if it's a new date
-                    if message_date != current_date:
-                        current_date = message_date
-                        formatted_history.append(f"\n[Date: {current_date}]\n")
-                else:
-                    timestamp_str = str(timestamp)
-            except (ValueError, TypeError):
-                timestamp_str = str(timestamp)
-                print(f"Could not parse timestamp: {timestamp}")
+            timestamp_str = str(timestamp)
 
         # Format the message
-        role = message.get("role", "unknown").upper()
+        role = (message.get("role") or "unknown").upper()
         content = message.get("content", "")
 
         formatted_history.append(f"[{timestamp_str}] {role}: {content}\n")
 
-    print(f"Formatted chat history with {len(unique_messages)} messages")
+    log.debug("Formatted chat history with %d messages", len(unique_messages))
     return "".join(formatted_history)
 
 
@@ -482,7 +507,7 @@ async def get_ai_summary(chat_history_text):
     Returns:
         str: AI-generated summary of the conversation
     """
-    print("Generating AI summary of chat history")
+    log.debug("Generating AI summary of chat history")
     try:
         # Create a prompt for the AI to summarize the conversation
         prompt = f"""Please summarize the following conversation in a concise paragraph:
@@ -491,174 +516,173 @@ async def get_ai_summary(chat_history_text):
 
 Summary:"""
 
-        # Get the AI response
-        complete_response = ""
+        # Get the AI response - chunks are collected in a list and joined once
+        parts = []
+        length = 0
         
         # Stream the AI response chunks using the existing chat model
-        async for chunk in chat.astream(
+        stream = chat.astream(
             [HumanMessage(content=prompt)]
-        ):
-            # Append to the complete response
-            complete_response += chunk.content
+        )
+        try:
+            async for chunk in stream:
+                parts.append(chunk.content)
+                length += len(chunk.content)
+                # Anything past 1000 characters is truncated below, so stop receiving it
+                if length > 1000:
+                    break
+        finally:
+            # Closing the generator cancels the upstream request right away, instead of
+            # leaving it to generate until the abandoned generator is garbage collected
+            await stream.aclose()
+        complete_response = "".join(parts)
 
         # If the summary is too long, truncate it
         if len(complete_response) > 1000:
-            print(f"Truncating summary from {len(complete_response)} to 1000 characters")
+            log.debug("Truncating summary from %d to 1000 characters", len(complete_response))
             complete_response = complete_response[:997] + "..."
 
-        print(f"AI summary generated: {len(complete_response)} characters")
+        log.debug("AI summary generated: %d characters", len(complete_response))
         return complete_response
-    except Exception as e:
-        print(f"Error generating AI summary: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+    except Exception:
+        log.exception("Error generating AI summary")
         return "Error generating summary. Please refer to the full conversation below."
 
 
+# Report recipients by pluggr_id, so repeated inactivity sweeps skip the lookup
+_REPORTS_EMAIL_TTL = 300
+_reports_email_cache = {}  # pluggr_id -> (email or None, expiry)
+
+
+def _get_reports_email(db: Session, pluggr_id: str):
+    """
+    Returns the reportsEmail configured for a pluggr, or None if it has none.
+    """
+    cached = _reports_email_cache.get(pluggr_id)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+
+    email = db.execute(
+        select(Pluggr.reportsEmail).where(Pluggr.id == pluggr_id)
+    ).scalar() or None
+    log.debug("Found recipient email: %s for pluggr_id: %s", email, pluggr_id)
+
+    _reports_email_cache[pluggr_id] = (email, time.monotonic() + _REPORTS_EMAIL_TTL)
+    return email
+
+
+# Summaries are LLM round-trips, so inactive chats are processed concurrently up to this limit
+_INACTIVE_CHAT_CONCURRENCY = 8
+_inactive_chat_semaphore = asyncio.Semaphore(_INACTIVE_CHAT_CONCURRENCY)
+
+
+def _load_inactive_chat(chat_id: str):
+    """
+    Returns the stored messages of a chat and its report recipient (or None). Blocks.
+    """
+    with SessionLocal() as db:
+        db_message_dicts = _select_messages(db, ChatMessage.chat_id == chat_id)
+
+        log.debug("Retrieved %d messages from database for chat_id: %s", len(db_message_dicts), chat_id)
+
+        # Get the pluggr_id from the first message
+        pluggr_id = None
+        if db_message_dicts:
+            pluggr_id = db_message_dicts[0]["pluggr_id"]
+            log.debug("Found pluggr_id: %s for chat_id: %s", pluggr_id, chat_id)
+
+        # Initialize recipient_email to None - we'll only send if we find a valid email
+        recipient_email = None
+        if pluggr_id:
+            try:
+                recipient_email = _get_reports_email(db, pluggr_id)
+            except Exception:
+                log.exception("Error fetching pluggr information")
+
+        return db_message_dicts, recipient_email
+
+
+async def _process_inactive_chat(chat_id: str, data: dict):
+    """
+    Emails the summary and full history of an inactive chat, then drops it from the cache.
+    """
+    async with _inactive_chat_semaphore:
+        try:
+            # Fetch complete chat history from the database, off the event loop
+            db_message_dicts, recipient_email = await asyncio.to_thread(_load_inactive_chat, chat_id)
+
+            # Combine with any unsaved messages in the cache
+            cached_messages = data.get("messages", [])
+            complete_history = db_message_dicts + cached_messages
+            log.debug("Combined history has %d messages", len(complete_history))
+
+            # Only send email if we found a valid recipient email
+            if recipient_email:
+                try:
+                    # Format the chat history in a human-readable way
+                    human_readable_history = format_chat_history_for_email(
+                        complete_history
+                    )
+
+                    # Get AI summary of the conversation
+                    log.debug("Generating AI summary for chat_id %s", chat_id)
+                    ai_summary = await get_ai_summary(human_readable_history)
+                    log.debug("AI summary generated: %d characters", len(ai_summary))
+
+                    # Create email content with summary and formatted history only (no JSON)
+                    email_content = (
+                        f"Chat History for Chat ID: {chat_id}\n\n"
+                        f"AI Summary:\n{ai_summary}\n\n"
+                        f"=== DETAILED CONVERSATION ===\n\n"
+                        f"{human_readable_history}"
+                    )
+
+                    log.debug("Sending chat history to email %s for chat_id %s", recipient_email, chat_id)
+
+                    # Send email to the determined recipient
+                    await asyncio.to_thread(
+                        send_email,
+                        recipient_email,
+                        f"Chat Summary for {chat_id}",
+                        email_content,
+                    )
+                    log.info("Email sent successfully to %s", recipient_email)
+                except Exception:
+                    log.exception("Error sending email")
+            else:
+                log.info("No recipient email found for chat_id %s, skipping email", chat_id)
+
+            # Remove the chat from cache after processing - unless messages arrived while
+            # the summary was generated, which makes the chat active again
+            entry = conversation_cache.get(chat_id)
+            if entry is not None and entry["last_message_time"] == data["last_message_time"]:
+                del conversation_cache[chat_id]
+                log.debug("Removed chat_id %s from cache", chat_id)
+
+        except Exception:
+            log.exception("Error processing inactive chat %s", chat_id)
+
+
 async def check_inactive_chats():
     """
     Check for inactive chat sessions and send chat history via email if inactive for more than 5 minutes.
     """
-    print("Starting background task to check for inactive chats")
+    log.info("Starting background task to check for inactive chats")
     while True:
-        current_time = datetime.now()
+        # last_message_time is a time.monotonic() reading, so idle time is one subtraction
+        current_time = time.monotonic()
+        inactive = []
         for chat_id, data in list(conversation_cache.items()):
             last_message_time = data.get("last_message_time")
             if (
                 last_message_time
-                and (current_time - last_message_time).total_seconds() > 10
+                and current_time - last_message_time > 10
             ):  # Keeping the short timeout for testing
-                print(f"Found inactive chat: {chat_id}, last activity: {last_message_time}")
-                
-                # Fetch complete chat history from the database
-                db: Session = SessionLocal()
-                try:
-                    messages = (
-                        db.query(ChatMessage)
-                        .filter(ChatMessage.chat_id == chat_id)
-                        .order_by(ChatMessage.timestamp.asc())
-                        .all()
-                    )
+                log.info("Found inactive chat: %s, idle for %.0f seconds", chat_id, current_time - last_message_time)
+                inactive.append(_process_inactive_chat(chat_id, data))
+
+        # Each chat logs its own failures, so one bad chat doesn't stop the others
+        await asyncio.gather(*inactive, return_exceptions=True)
 
-                    print(f"Retrieved {len(messages)} messages from database for chat_id: {chat_id}")
-
-                    # Convert ORM objects to dictionaries
-                    db_message_dicts = [
-                        {
-                            "id": msg.id,
-                            "chat_id": msg.chat_id,
-                            "role": msg.role,
-                            "content": msg.content,
-                            "pluggr_id": msg.pluggr_id,
-                            "admin_id": getattr(msg, 'admin_id', None),
-                            "persona": getattr(msg, 'persona', None),
-                            "timestamp": msg.timestamp,  # Keep as datetime for now
-                        }
-                        for msg in messages
-                    ]
-
-                    # Get the pluggr_id from the first message
-                    pluggr_id = None
-                    if messages and hasattr(messages[0], "pluggr_id"):
-                        pluggr_id = messages[0].pluggr_id
-                        print(f"Found pluggr_id: {pluggr_id} for chat_id: {chat_id}")
-
-                    # Initialize recipient_email to None - we'll only send if we find a valid email
-                    recipient_email = None
-                    if pluggr_id:
-                        try:
-                            from sqlalchemy import text
-
-                            # Try to find by id
-                            result = db.execute(
-                                text(
-                                    f"SELECT * FROM \"Pluggr\" WHERE id = '{pluggr_id}'"
-                                )
-                            ).fetchone()
-                            if result:
-                                result_dict = dict(result._mapping)
-                                if (
-                                    "reportsEmail" in result_dict
-                                    and result_dict["reportsEmail"]
-                                ):
-                                    recipient_email = result_dict["reportsEmail"]
-                                    print(f"Found recipient email: {recipient_email} for pluggr_id: {pluggr_id}")
-                            else:
-                                print(f"No direct match for pluggr_id: {pluggr_id}, trying partial matches")
-                                # Check if pluggr_id is in any field
-                                for field in ["id", "userId"]:
-                                    query = f'SELECT * FROM "Pluggr" WHERE "{field}" LIKE \'%{pluggr_id}%\''
-                                    result = db.execute(text(query)).fetchone()
-                                    if result:
-                                        result_dict = dict(result._mapping)
-                                        if (
-                                            "reportsEmail" in result_dict
-                                            and result_dict["reportsEmail"]
-                                        ):
-                                            recipient_email = result_dict[
-                                                "reportsEmail"
-                                            ]
-                                            print(f"Found recipient email via partial match: {recipient_email}")
-                                        break
-
-                        except Exception as e:
-                            print(f"Error fetching pluggr information: {str(e)}")
-                            import traceback
-                            print(traceback.format_exc())
-
-                    # Combine with any unsaved messages in the cache
-                    cached_messages = data.get("messages", [])
-                    complete_history = db_message_dicts + cached_messages
-                    print(f"Combined history has {len(complete_history)} messages")
-
-                    # Only send email if we found a valid recipient email
-                    if recipient_email:
-                        try:
-                            # Format the chat history in a human-readable way
-                            human_readable_history = format_chat_history_for_email(
-                                complete_history
-                            )
-
-                            # Get AI summary of the conversation
-                            print(f"Generating AI summary for chat_id {chat_id}")
-                            ai_summary = await get_ai_summary(human_readable_history)
-                            print(f"AI summary generated: {len(ai_summary)} characters")
-
-                            # Create email content with summary and formatted history only (no JSON)
-                            email_content = (
-                                f"Chat History for Chat ID: {chat_id}\n\n"
-                                f"AI Summary:\n{ai_summary}\n\n"
-                                f"=== DETAILED CONVERSATION ===\n\n"
-                                f"{human_readable_history}"
-                            )
-
-                            print(f"Sending chat history to email {recipient_email} for chat_id {chat_id}")
-
-                            # Send email to the determined recipient
-                            send_email(
-                                recipient_email,
-                                f"Chat Summary for {chat_id}",
-                                email_content,
-                            )
-                            print(f"Email sent successfully to {recipient_email}")
-                        except Exception as e:
-                            print(f"Error sending email: {str(e)}")
-                            import traceback
-                            print(traceback.format_exc())
-                    else:
-                        print(f"No recipient email found for chat_id {chat_id}, skipping email")
-
-                    # Remove the chat from cache after processing
-                    del conversation_cache[chat_id]
-                    print(f"Removed chat_id {chat_id} from cache")
-
-                except Exception as e:
-                    print(f"Error processing inactive chat {chat_id}: {str(e)}")
-                    import traceback
-                    print(traceback.format_exc())
-                finally:
-                    db.close()
-                    print("Database session closed")
-
-        print("Finished checking for inactive chats, sleeping for 60 seconds")
+        log.debug("Finished checking for inactive chats, sleeping for 60 seconds")
         await asyncio.sleep(5)  # Keeping the short check interval for testing
@@ -1,11 +1,205 @@
 from core.milvus_manager import (
     MilvusManager,
+    is_connection_error,
 )  # Use MilvusManager for all Milvus operations
+import asyncio
+import functools
+import httpx
+import itertools
+import logging
+import numpy as np
 import openai
-from core.config import settings  # Application settings and configuration
+import sqlite3
+import threading
+from core.config import get_settings  # Application settings and configuration
+from core.embedding_cache import EmbeddingCache
+from core.fuzzy_cache import FuzzyCache
+from core.semantic_cache import SemanticCache
 from utils.helpers import extract_chunk_texts
 
-openai.api_key = settings.OPENAI_API_KEY
+log = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Search parameters for the HNSW index using the inner-product metric, and the number of
+# nearest chunks returned per prompt (MilvusManager passes these through unmodified).
+# ef is the candidate list size per query: it must be >= topk, and larger values raise
+# recall at the cost of latency. To tune it, measure recall@3 on sample queries against
+# an exact search and set MILVUS_SEARCH_PARAMS to the smallest value that meets the target.
+_TOPK = 3
+_SEARCH_PARAMS = {"metric_type": "IP", "params": get_settings().MILVUS_SEARCH_PARAMS or {"ef": 32}}
+
+# Shared embedding clients (async for aget_relevant_documents, so requests don't block the
+# event loop). They keep connections open across calls, and a stalled request fails after
+# the timeout instead of holding a worker thread indefinitely.
+# They are created on first use, so importing this module doesn't require an API key.
+_EMBEDDING_TIMEOUT = httpx.Timeout(5.0, connect=1.0)
+
+@functools.lru_cache(maxsize=None)
+def _get_client() -> openai.OpenAI:
+    """Return the shared sync embedding client, creating it on first use."""
+    return openai.OpenAI(api_key=get_settings().OPENAI_API_KEY, timeout=_EMBEDDING_TIMEOUT, max_retries=2)
+
+@functools.lru_cache(maxsize=None)
+def _get_aclient() -> openai.AsyncOpenAI:
+    """Return the shared async embedding client, creating it on first use."""
+    return openai.AsyncOpenAI(api_key=get_settings().OPENAI_API_KEY, timeout=_EMBEDDING_TIMEOUT, max_retries=2)
+
+# A small pool of MilvusManagers, each on its own gRPC channel, handed out round-robin so
+# concurrent searches don't all queue on one channel. Constructing a manager checks the
+# collection over RPC, so each one is created on first use and then reused. The pool uses
+# channels 1..N, leaving the default channel 0 to managers elsewhere, so a slot's client
+# is only ever held by that slot.
+_milvus_managers = [None] * max(get_settings().MILVUS_POOL_SIZE, 1)
+_milvus_manager_slots = itertools.cycle(range(len(_milvus_managers)))
+_milvus_manager_lock = threading.Lock()
+
+def _get_milvus_manager() -> MilvusManager:
+    """Return the next MilvusManager of the pool, creating it on first use."""
+    with _milvus_manager_lock:
+        slot = next(_milvus_manager_slots)
+        if _milvus_managers[slot] is None:
+            _milvus_managers[slot] = MilvusManager(channel=slot + 1)
+        return _milvus_managers[slot]
+
+def _reset_milvus_manager(milvus_manager: MilvusManager):
+    """
+    Drop a pooled MilvusManager and close its client, so the next search on its slot
+    reconnects and sets the collection up again. The other slots are left alone.
+    """
+    with _milvus_manager_lock:
+        for slot, pooled in enumerate(_milvus_managers):
+            if pooled is milvus_manager:
+                _milvus_managers[slot] = None
+                break
+        else:
+            return  # already reset by a concurrent search
+    client = milvus_manager.drop_client()
+    if client is not None:
+        try:
+            client.close()
+        except Exception as e:
+            log.debug("Closing the Milvus client failed: %s", e)
+
+# Recent search results per user, keyed by prompt embedding: a near-duplicate prompt
+# (cosine similarity >= 0.97) from the same user reuses them instead of searching Milvus.
+# Inserts made by this process expire the user's entries right away; the short TTL bounds
+# how long inserts made by other processes go unseen
+_results_cache = SemanticCache(threshold=0.97, ttl_seconds=300, max_entries=512)
+_results_cache_lock = threading.Lock()  # searches may run in several worker threads
+
+def invalidate_user_results(user_id: str):
+    """
+    Drop the cached search results of a user, e.g. after new documents were inserted for them.
+
+    Args:
+        user_id (str): The user whose documents changed
+    """
+    with _results_cache_lock:
+        _results_cache.invalidate(namespace=user_id)
+
+# Embeddings of every prompt seen so far, kept on disk so they survive restarts
+try:
+    _embedding_cache = EmbeddingCache()
+except (OSError, sqlite3.Error) as e:
+    log.warning("Embedding cache unavailable, prompts will always be embedded: %s", e)
+    _embedding_cache = None
+
+# Embeddings of recent prompts by SimHash, checked before the disk cache, so an edited
+# prompt (different case or spacing, or a typo in a longer prompt) reuses the embedding
+# of its earlier version without an API call
+_fuzzy_embeddings = FuzzyCache(max_entries=2048, max_distance=3)
+_fuzzy_embeddings_lock = threading.Lock()
+
+def _as_vector(embedding) -> np.ndarray:
+    """
+    Convert an embedding to a read-only float32 array, the representation used from the
+    API response to the Milvus request (and shared by the caches, hence read-only).
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    vector.flags.writeable = False
+    return vector
+
+def _load_embedding(prompt: str, model: str):
+    """Return the prompt's embedding from the fuzzy or disk cache, or None on a miss."""
+    with _fuzzy_embeddings_lock:
+        cached = _fuzzy_embeddings.get(prompt)
+    if cached is not None and cached[0] == model:
+        log.debug("Reusing the embedding of a near-identical prompt")
+        return cached[1]
+
+    if _embedding_cache is None:
+        return None
+    try:
+        embedding = _embedding_cache.get(prompt, model)
+    except sqlite3.Error as e:
+        log.warning("Embedding cache lookup failed: %s", e)
+        return None
+    if embedding is not None:
+        with _fuzzy_embeddings_lock:
+            _fuzzy_embeddings.put(prompt, (model, embedding))
+    return embedding  # np.frombuffer arrays are float32 and read-only already
+
+def _save_embedding(prompt: str, model: str, embedding: np.ndarray):
+    """Write a prompt's embedding to the caches; failures only cost a future API call."""
+    with _fuzzy_embeddings_lock:
+        _fuzzy_embeddings.put(prompt, (model, embedding))
+    if _embedding_cache is None:
+        return
+    try:
+        _embedding_cache.put(prompt, model, embedding)
+    except sqlite3.Error as e:
+        log.warning("Embedding cache write failed: %s", e)
+
+@functools.lru_cache(maxsize=2048)
+def _embed(prompt: str, model: str) -> np.ndarray:
+    """Return the embedding of a prompt as a float32 array, remembering recent ones."""
+    embedding = _load_embedding(prompt, model)
+    if embedding is None:
+        response = _get_client().embeddings.create(input=[prompt], model=model)
+        embedding = _as_vector(response.data[0].embedding)
+        _save_embedding(prompt, model, embedding)
+    return embedding
+
+def _search_chunk_texts(milvus_manager: MilvusManager, prompt_embeddings: list, user_id: str):
+    """
+    Search Milvus for all the prompt embeddings in one request.
+
+    Returns:
+        One string of concatenated chunk texts per embedding, or None if the search failed
+    """
+    log.debug("Search parameters: %s, topk: %d", _SEARCH_PARAMS, _TOPK)
+
+    # Use filter expression templating for better performance: the expression text is the
+    # same for every user, and {uid} is replaced with the user_id passed in filter_params.
+    filter_expression = "user_id == {uid}"
+    filter_params = {"uid": user_id}
+    log.debug("Filter expression: %s, params: %s", filter_expression, filter_params)
+
+    try:
+        # Execute the Milvus search.
+        # Note: Milvus returns a list of lists (one sub-list per query vector).
+        log.debug("Executing Milvus search for %d prompts", len(prompt_embeddings))
+        results = milvus_manager.search_batch(
+            query_embeddings=prompt_embeddings,
+            topk=_TOPK,
+            search_params=_SEARCH_PARAMS,
+            anns_field="document_embeddings",  # Field containing the stored vectors.
+            filter_expression=filter_expression,
+            filter_params=filter_params,
+            output_fields=["chunk_text", "document_id"],
+        )
+        log.debug("Milvus search completed successfully")
+    except Exception as e:
+        log.exception("Error during Milvus search: %s", e)
+        # A lost connection won't come back on the same client - reconnect next time. Other
+        # errors (e.g. an invalid filter) keep the managers.
+        if is_connection_error(e):
+            _reset_milvus_manager(milvus_manager)
+        return None
+
+    # Extract relevant text chunks from each query's hits.
+    return [extract_chunk_texts(hits) for hits in results]
 
 def get_relevant_documents(prompt: str, user_id: str):
     """
@@ -18,70 +212,167 @@ def get_relevant_documents(prompt: str, user_id: str):
     Returns:
         A string containing the concatenated text chunks from relevant documents
     """
-    print(f"Retrieving relevant documents for user_id: {user_id}")
-    print(f"Prompt length: {len(prompt)} characters")
+    log.debug("Retrieving relevant documents for user_id: %s", user_id)
+    if not prompt or not prompt.strip() or not user_id:
+        log.debug("Empty prompt or user_id, skipping retrieval")
+        return ""
+    log.debug("Prompt length: %d characters", len(prompt))
     
-    # Initialize the MilvusManager instance to encapsulate all Milvus operations
-    milvus_manager = MilvusManager()
-    print("Initialized MilvusManager")
+    # Reuse a pooled MilvusManager instance that encapsulates all Milvus operations
+    milvus_manager = _get_milvus_manager()
 
-    # Initialize LangChain embeddings with the OpenAI API key from settings
+    # Generate an embedding vector for the provided prompt text (repeated prompts hit the cache)
     try:
-        embeddings = openai.embeddings.create(input=prompt, model="text-embedding-3-small")
-        print("Initialized OpenAI embeddings")
+        prompt_embedding = _embed(prompt, EMBEDDING_MODEL)
+        log.debug("Generated embedding for prompt")
     except Exception as e:
-        print(f"Failed to initialize OpenAI embeddings: {str(e)}")
+        log.error("Failed to generate embedding for prompt: %s", e)
         return ""
 
-    # Generate an embedding vector for the provided prompt text.
-    try:
-        prompt_embedding = embeddings.embed_query(prompt)
-        print("Generated embedding for prompt")
-    except Exception as e:
-        print(f"Failed to generate embedding for prompt: {str(e)}")
-        return ""
+    # A near-duplicate of a recent prompt from this user reuses its results
+    with _results_cache_lock:
+        cached_texts = _results_cache.lookup(prompt_embedding, namespace=user_id)
+    if cached_texts is not None:
+        log.debug("Reusing results of a similar recent prompt")
+        return cached_texts
+
+    texts = _search_chunk_texts(milvus_manager, [prompt_embedding], user_id)
+    if texts is None:
+        return ""  # Failed searches are not cached, so they are retried next time
+
+    relevant_texts = texts[0]
+    log.debug("Extracted %d characters of relevant text", len(relevant_texts))
+
+    with _results_cache_lock:
+        _results_cache.store(prompt, prompt_embedding, relevant_texts, namespace=user_id)
+
+    return relevant_texts
+
+def get_relevant_documents_batch(prompts: list, user_id: str) -> list:
+    """
+    Retrieves relevant document chunks for several prompts at once: all prompts are
+    embedded in one OpenAI request and searched in one Milvus request.
+
+    Args:
+        prompts: The user queries or prompt texts
+        user_id: The ID of the user to filter documents by
 
-    # Define search parameters for Milvus query using the L2 metric with a depth level of 2.
-    search_params = {"metric_type": "L2", "params": {"level": 2}}
-    topk = 3  # Limit the search to the top 3 nearest documents.
-    print(f"Search parameters: {search_params}, topk: {topk}")
+    Returns:
+        A list with one string of concatenated text chunks per prompt
+    """
+    log.debug("Retrieving relevant documents for %d prompts, user_id: %s", len(prompts), user_id)
+    if not prompts:
+        return []
+    if not user_id:
+        log.debug("Empty user_id, skipping retrieval")
+        return [""] * len(prompts)
+
+    # Blank prompts get no documents; only the others are embedded and searched
+    wanted = [i for i, prompt in enumerate(prompts) if prompt and prompt.strip()]
+    if len(wanted) < len(prompts):
+        relevant_texts = [""] * len(prompts)
+        if wanted:
+            texts = get_relevant_documents_batch([prompts[i] for i in wanted], user_id)
+            for i, text in zip(wanted, texts):
+                relevant_texts[i] = text
+        return relevant_texts
 
-    # Use filter expression templating for better performance.
-    # The filter expression uses the 'document_id' field and replaces {document_ids} with
-    # the provided list from filter_params.
-    filter_expression = f'user_id == "{user_id}"'
-    print(f"Filter expression: {filter_expression}")
+    milvus_manager = _get_milvus_manager()
 
+    # Only prompts missing from the disk cache are sent to OpenAI, still in one request
+    prompt_embeddings = [_load_embedding(prompt, EMBEDDING_MODEL) for prompt in prompts]
+    uncached = [i for i, embedding in enumerate(prompt_embeddings) if embedding is None]
     try:
-        # Execute the Milvus search.
-        # Note: Milvus returns a list of lists (one sub-list per query vector even if only one vector is provided).
-        print("Executing Milvus search")
-        results = milvus_manager.search(
-            query_embedding=prompt_embedding,
-            topk=topk,
-            search_params=search_params,
-            anns_field="document_embeddings",  # Field containing the stored vectors.
-            filter_expression=filter_expression,
-        )
-        print("Milvus search completed successfully")
+        if uncached:
+            response = _get_client().embeddings.create(input=[prompts[i] for i in uncached], model=EMBEDDING_MODEL)
+            for i, item in zip(uncached, response.data):
+                prompt_embeddings[i] = _as_vector(item.embedding)
+                _save_embedding(prompts[i], EMBEDDING_MODEL, prompt_embeddings[i])
+        log.debug("Generated %d prompt embeddings", len(uncached))
     except Exception as e:
-        print(f"Error during Milvus search: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
-        results = []  # Fallback to an empty list on error.
-
-    # Flatten the result list because Milvus returns a list of lists.
-    flattened_results = []
-    for res_group in results:
-        if isinstance(res_group, list):
-            flattened_results.extend(res_group)
+        log.error("Failed to generate embeddings for prompts: %s", e)
+        return [""] * len(prompts)
+
+    # Answer near-duplicates of recent prompts from the cache and search only the rest
+    relevant_texts = [None] * len(prompts)
+    with _results_cache_lock:
+        for i, embedding in enumerate(prompt_embeddings):
+            relevant_texts[i] = _results_cache.lookup(embedding, namespace=user_id)
+    misses = [i for i, texts in enumerate(relevant_texts) if texts is None]
+    log.debug("%d prompts answered from the results cache", len(prompts) - len(misses))
+
+    if misses:
+        texts = _search_chunk_texts(milvus_manager, [prompt_embeddings[i] for i in misses], user_id)
+        if texts is None:
+            texts = [""] * len(misses)
         else:
-            flattened_results.append(res_group)
-    
-    print(f"Flattened results contain {len(flattened_results)} items")
+            with _results_cache_lock:
+                for i, text in zip(misses, texts):
+                    _results_cache.store(prompts[i], prompt_embeddings[i], text, namespace=user_id)
+        for i, text in zip(misses, texts):
+            relevant_texts[i] = text
 
-    # Extract relevant text chunks from the flattened search results.
-    relevant_texts = extract_chunk_texts(flattened_results)
-    print(f"Extracted {len(relevant_texts)} characters of relevant text")
-    
-    return relevant_texts
\ No newline at end of file
+    return relevant_texts
+
+async def _aembed(prompt: str, model: str) -> np.ndarray:
+    """Async version of _embed(), backed by the SimHash fuzzy cache and the disk cache."""
+    embedding = await asyncio.to_thread(_load_embedding, prompt, model)
+    if embedding is None:
+        response = await _get_aclient().embeddings.create(input=[prompt], model=model)
+        embedding = _as_vector(response.data[0].embedding)
+        await asyncio.to_thread(_save_embedding, prompt, model, embedding)
+        log.debug("Generated embedding for prompt")
+    return embedding
+
+async def _aget_milvus_manager() -> MilvusManager:
+    """Return the next pooled MilvusManager, creating it in a worker thread on first use."""
+    if all(_milvus_managers):
+        return _get_milvus_manager()  # every manager exists, so no RPC is needed
+    return await asyncio.to_thread(_get_milvus_manager)
+
+async def aget_relevant_documents(prompt: str, user_id: str):
+    """
+    Async version of get_relevant_documents(): the embedding request goes through the
+    async OpenAI client and the Milvus search runs in a worker thread, so several
+    retrievals can be awaited concurrently (e.g. with asyncio.gather).
+
+    Args:
+        prompt: The user query or prompt text
+        user_id: The ID of the user to filter documents by
+
+    Returns:
+        A string containing the concatenated text chunks from relevant documents
+    """
+    log.debug("Retrieving relevant documents for user_id: %s", user_id)
+    if not prompt or not prompt.strip() or not user_id:
+        log.debug("Empty prompt or user_id, skipping retrieval")
+        return ""
+
+    # Set up Milvus (a cold start checks and loads the collection over RPC) while the
+    # prompt is being embedded, instead of one after the other
+    prompt_embedding, milvus_manager = await asyncio.gather(
+        _aembed(prompt, EMBEDDING_MODEL), _aget_milvus_manager(), return_exceptions=True
+    )
+    if isinstance(prompt_embedding, Exception):
+        log.error("Failed to generate embedding for prompt: %s", prompt_embedding)
+        return ""
+
+    with _results_cache_lock:
+        cached_texts = _results_cache.lookup(prompt_embedding, namespace=user_id)
+    if cached_texts is not None:
+        log.debug("Reusing results of a similar recent prompt")
+        return cached_texts
+
+    if isinstance(milvus_manager, Exception):
+        raise milvus_manager
+    texts = await asyncio.to_thread(_search_chunk_texts, milvus_manager, [prompt_embedding], user_id)
+    if texts is None:
+        return ""
+
+    relevant_texts = texts[0]
+    log.debug("Extracted %d characters of relevant text", len(relevant_texts))
+
+    with _results_cache_lock:
+        _results_cache.store(prompt, prompt_embedding, relevant_texts, namespace=user_id)
+
+    return relevant_texts